@@ -0,0 +1,168 @@
+#---------------------------------------------------------------------------------------------------------------------#
+# Comfyroll Studio custom nodes by RockOfFire and Akatsuzi    https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes
+# for ComfyUI                                                 https://github.com/comfyanonymous/ComfyUI
+#---------------------------------------------------------------------------------------------------------------------#
+# Peak memory of the CR Apply Model Merge methods on synthetic checkpoints
+#
+# Usage, from the ComfyUI folder:
+#   python custom_nodes/ComfyUI_Comfyroll_CustomNodes/benchmarks/bench_model_merge.py --models 3 5
+#
+# Synthetic state dicts cannot be built into real models, so both methods are measured at
+# the state dict level:
+#   recursive  every checkpoint is copied into memory and stays resident, as the models in
+#              the stack do while their key patches are applied, and the merged weights are built
+#   streaming  the weights of the first checkpoint are loaded as the model, then
+#              functions_models.merged_tensors is copied into them key by key, as
+#              stream_merge_checkpoints does
+# Each run is a separate process. Peak memory is the largest anonymous RSS seen above the
+# level after setup, so pages mapped from the checkpoint files are not counted.
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import subprocess
+import importlib.util
+
+import torch
+
+here = os.path.dirname(os.path.realpath(__file__))
+
+
+def anonymous_rss():
+    # Resident anonymous memory in bytes, Linux only
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) * 1024
+    raise RuntimeError("RssAnon is not available on this platform")
+
+
+class PeakSampler:
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.peak = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+
+    def sample(self):
+        while self.running:
+            self.peak = max(self.peak, anonymous_rss())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.running = False
+        self.thread.join()
+        self.peak = max(self.peak, anonymous_rss())
+
+
+def load_functions_models(comfyui):
+    # functions_models only needs comfy and folder_paths, so it is loaded without the rest of the package
+    sys.path.insert(0, comfyui)
+    spec = importlib.util.spec_from_file_location("functions_models", os.path.join(here, "..", "nodes", "functions_models.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_checkpoints(folder, count, blocks, size):
+    from safetensors.torch import save_file
+
+    paths = []
+    for index in range(count):
+        generator = torch.Generator().manual_seed(index)
+        sd = {}
+        for block in range(blocks):
+            sd[f"model.diffusion_model.block{block}.weight"] = torch.randn(size, size, generator=generator).half()
+        for block in range(max(blocks // 8, 1)):
+            sd[f"cond_stage_model.transformer.layer{block}.weight"] = torch.randn(size, size, generator=generator).half()
+        sd["first_stage_model.decoder.weight"] = torch.randn(size, size, generator=generator).half()
+        path = os.path.join(folder, f"synthetic_{index}.safetensors")
+        save_file(sd, path)
+        paths.append(path)
+    return paths
+
+
+def merge_recursive(models, paths, weights):
+    import comfy.utils
+
+    # Each loaded checkpoint holds its own copy of the weights, as a built model does
+    sds = [{key: tensor.clone() for key, tensor in comfy.utils.load_torch_file(path, safe_load=True).items()}
+           for path in paths]
+    merged = {}
+    for key, base in sds[0].items():
+        if key.startswith(models.merge_skip_prefixes):
+            continue
+        total = base.to(torch.float32).mul_(weights[0])
+        for sd, weight in zip(sds[1:], weights[1:]):
+            total.add_(sd[key], alpha=weight)
+        merged[key] = total.to(base.dtype)
+    return merged
+
+
+def merge_streaming(models, paths, weights):
+    import comfy.utils
+
+    model = {key: tensor.clone() for key, tensor in comfy.utils.load_torch_file(paths[0], safe_load=True).items()
+             if not key.startswith(models.merge_skip_prefixes)}
+    for key, tensor in models.merged_tensors(paths, weights, weights):
+        model[key].copy_(tensor)
+        del tensor
+    return model
+
+
+def run_one(comfyui, method, paths):
+    models = load_functions_models(comfyui)
+    weights = [1 / len(paths)] * len(paths)
+    merge = merge_recursive if method == "recursive" else merge_streaming
+
+    start_rss = anonymous_rss()
+    start = time.perf_counter()
+    with PeakSampler() as sampler:
+        merged = merge(models, paths, weights)
+    elapsed = time.perf_counter() - start
+
+    model_bytes = sum(tensor.nbytes for tensor in merged.values())
+    print(f"{sampler.peak - start_rss} {model_bytes} {elapsed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of the CR Apply Model Merge methods")
+    parser.add_argument("--comfyui", default=os.path.join(here, "..", "..", ".."), help="ComfyUI folder")
+    parser.add_argument("--models", type=int, nargs="+", default=[3, 5], help="number of checkpoints to merge")
+    parser.add_argument("--blocks", type=int, default=48, help="UNet tensors per checkpoint")
+    parser.add_argument("--size", type=int, default=1024, help="each tensor is size x size fp16")
+    parser.add_argument("--run", nargs=2, metavar=("METHOD", "FOLDER"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        method, folder = args.run
+        paths = sorted(os.path.join(folder, name) for name in os.listdir(folder))
+        run_one(os.path.realpath(args.comfyui), method, paths)
+        return
+
+    print(f"{'models':>6} {'model MB':>9} {'recursive MB':>13} {'streaming MB':>13} {'recursive s':>12} {'streaming s':>12}")
+    for count in args.models:
+        with tempfile.TemporaryDirectory() as folder:
+            write_checkpoints(folder, count, args.blocks, args.size)
+            results = {}
+            for method in ("recursive", "streaming"):
+                out = subprocess.run([sys.executable, os.path.realpath(__file__), "--comfyui", args.comfyui,
+                                      "--run", method, folder], check=True, capture_output=True, text=True)
+                peak, model_bytes, elapsed = out.stdout.split()[-3:]
+                results[method] = (int(peak), int(model_bytes), float(elapsed))
+
+        mb = 1024 ** 2
+        print(f"{count:>6} {results['streaming'][1] / mb:>9.0f} {results['recursive'][0] / mb:>13.0f} "
+              f"{results['streaming'][0] / mb:>13.0f} {results['recursive'][2]:>12.2f} {results['streaming'][2]:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
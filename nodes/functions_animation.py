@@ -7,99 +7,191 @@
 # FUNCTIONS
 #-----------------------------------------------------------------------------------------------------------#
 
+import weakref
+import numpy as np
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+# Compiled schedules kept between frames, keyed by kind and schedule content
+max_compiled_schedules = 32
+
+compiled_schedules = OrderedDict()
+
+# Encoded prompts kept between frames, keyed by CLIP, its patches and last layer, and the prompt text
+max_cached_conditioning = 32
+
+conditioning_cache = OrderedDict()
+
+conditioning_stats = {"hits": 0, "misses": 0}
+
+
+class CompiledSchedule:
+    """
+    A schedule parsed once into per-alias frame and value arrays.
+
+    Lines keep their schedule order. Lookups bisect the running maximum of the
+    frames, which finds the first line at or after the current frame exactly
+    as the old line-by-line scan did, including for unsorted schedules.
+    """
+
+    def __init__(self, schedule, kind="keyframe"):
+        self.kind = kind
+        self.tracks = {}
+
+        lines = {}
+        for alias, line in schedule:
+            lines.setdefault(alias, []).append(line)
+
+        for alias, alias_lines in lines.items():
+            self.tracks[alias] = self.parse_track(alias_lines)
+
+    def parse_track(self, lines):
+        frames = []
+        values = []
+        error = None
+
+        for i, line in enumerate(lines):
+            try:
+                if self.kind == "keyframe":
+                    # Skip empty lines
+                    if not line.strip():
+                        print(f"[Warning] Skipped blank line at line {i}")
+                        continue
+                    frame_str, value = line.split(',', 1)
+                    frame = int(frame_str)
+                    value = value.lstrip()
+                else:
+                    frame_str, value = line.split(',', 1)
+                    frame = int(frame_str.strip('\"'))
+                    value = value.lstrip().replace('"', '')
+            except ValueError as e:
+                # The old scan only failed once it reached this line, so keep the error until then
+                error = e
+                break
+            frames.append(frame)
+            values.append(value)
+
+        # Running maximum of the frames, so lookups can bisect even when lines are out of order
+        peaks = []
+        for frame in frames:
+            peaks.append(max(frame, peaks[-1]) if peaks else frame)
+
+        return frames, values, peaks, error
+
+    def locate(self, track, current_frame):
+        frames, _, peaks, error = track
+        index = bisect_left(peaks, current_frame)
+        if error is not None and index == len(frames):
+            raise error
+        return index
+
+    def keyframe_at(self, track, index, current_frame):
+        frames, values, _, _ = track
+        if index < len(frames) and frames[index] == current_frame:
+            return values[index]
+        return values[index - 1] if index > 0 else ""
+
+    def prompt_at(self, track, index, current_frame):
+        frames, values, _, _ = track
+        previous_prompt, previous_keyframe = (values[index - 1], frames[index - 1]) if index > 0 else ("", 0)
+        if index == len(frames):
+            return previous_prompt, previous_prompt, previous_keyframe, previous_keyframe
+        if frames[index] == current_frame:
+            return values[index], values[index], frames[index], frames[index]
+        return previous_prompt, values[index], previous_keyframe, frames[index]
+
+    def evaluate(self, schedule_alias, current_frame):
+        track = self.tracks.get(schedule_alias, ([], [], [], None))
+        index = self.locate(track, current_frame)
+        if self.kind == "keyframe":
+            return self.keyframe_at(track, index, current_frame)
+        return self.prompt_at(track, index, current_frame)
+
+    def next_keyframe(self, schedule_alias, current_frame):
+        """
+        Return (frame, value) of the first line that takes effect after current_frame, or None.
+        """
+        frames, values, peaks, _ = self.tracks.get(schedule_alias, ([], [], [], None))
+        index = bisect_right(peaks, current_frame)
+        if index == len(frames):
+            return None
+        return frames[index], values[index]
+
+    def evaluate_range(self, schedule_alias, start, end):
+        """
+        Evaluate every frame in range(start, end) with one searchsorted call.
+        """
+        track = self.tracks.get(schedule_alias, ([], [], [], None))
+        frames, _, peaks, error = track
+
+        current_frames = np.arange(start, end)
+        indices = np.searchsorted(np.array(peaks, dtype=np.int64), current_frames, side="left")
+        if error is not None and np.any(indices == len(frames)):
+            raise error
+
+        at = self.keyframe_at if self.kind == "keyframe" else self.prompt_at
+        return [at(track, int(index), int(frame)) for index, frame in zip(indices, current_frames)]
+
+
+def get_compiled_schedule(schedule, kind="keyframe"):
+    # Schedule lines are (alias, line) tuples of strings, which cache their hashes
+    key = (kind, tuple(item if type(item) is tuple else tuple(item) for item in schedule))
+
+    compiled = compiled_schedules.get(key)
+    if compiled is not None:
+        compiled_schedules.move_to_end(key)
+        return compiled
+
+    compiled = CompiledSchedule(schedule, kind)
+    compiled_schedules[key] = compiled
+    while len(compiled_schedules) > max_compiled_schedules:
+        compiled_schedules.popitem(last=False)
+
+    return compiled
+
+
 def keyframe_scheduler(schedule, schedule_alias, current_frame):
+    # Return the params of the keyframe at or before current_frame
+    return get_compiled_schedule(schedule, "keyframe").evaluate(schedule_alias, current_frame)
+
 
-    # Initialise
-    schedule_lines = list()
-    previous_params = ""
-    
-    # Loop through the schedule to find lines with matching schedule_alias
-    for item in schedule:   
-        alias = item[0]
-        if alias == schedule_alias:
-            schedule_lines.extend([(item)])
-
-    # Loop through the filtered lines
-    for i, item in enumerate(schedule_lines):
-        # Get alias and schedule line
-        alias, line = item
-        
-        # Skip empty lines
-        if not line.strip():
-            print(f"[Warning] Skipped blank line at line {i}")
-            continue
-            
-        # Get parameters from the tuples
-        frame_str, params = line.split(',', 1)
-        frame = int(frame_str)
-        
-        # Strip spaces at start of params
-        params = params.lstrip()
-        
-        # Return the params
-        if frame < current_frame:
-            previous_params = params
-            continue
-        if frame == current_frame:
-            previous_params = params
-        else:
-            params = previous_params
-        return params
-            
-    # Continue using the final params after the last schedule line has been evaluated     
-    return previous_params
-    
 def prompt_scheduler(schedule, schedule_alias, current_frame):
+    # Return the current and next prompts and their keyframes for current_frame
+    return get_compiled_schedule(schedule, "prompt").evaluate(schedule_alias, current_frame)
+
+
+def clip_cache_key(clip):
+    # A CLIP with other patches (LoRAs) or another last layer encodes the same text differently
+    patcher = getattr(clip, "patcher", None)
+    return id(clip), getattr(patcher, "patches_uuid", None), getattr(clip, "layer_idx", None)
+
+
+def encode_prompt(clip, text):
+    """
+    Return (cond, pooled) for a prompt, running CLIP only if this CLIP has not encoded it recently.
+
+    Entries hold a weak reference to their CLIP, so the cache does not keep a model
+    alive, and a CLIP that reuses the id of a freed one never gets its conditioning.
+    """
+    key = clip_cache_key(clip) + (text,)
+
+    cached = conditioning_cache.get(key)
+    if cached is not None and cached[0]() is clip:
+        conditioning_stats["hits"] += 1
+        conditioning_cache.move_to_end(key)
+        return cached[1], cached[2]
+
+    conditioning_stats["misses"] += 1
+    tokens = clip.tokenize(text)
+    cond, pooled = clip.encode_from_tokens(tokens, return_pooled=True)
+
+    conditioning_cache[key] = (weakref.ref(clip), cond, pooled)
+    conditioning_cache.move_to_end(key)
+    while len(conditioning_cache) > max_cached_conditioning:
+        conditioning_cache.popitem(last=False)
+
+    return cond, pooled
+
 
-    # Initialise
-    schedule_lines = list()
-    previous_prompt = ""
-    previous_keyframe = 0
-    
-    #print(schedule, schedule_alias, current_frame) 
-    
-    # Loop through the schedule to find lines with matching schedule_alias
-    for item in schedule:   
-        alias = item[0]
-        if alias == schedule_alias:
-            schedule_lines.extend([(item)])
-
-    # Loop through the filtered lines
-    for i, item in enumerate(schedule_lines):
-        # Get alias and schedule line
-        alias, line = item
-            
-        # Get parameters from the tuples 
-        frame_str, prompt = line.split(',', 1)
-        frame_str = frame_str.strip('\"')
-        frame = int(frame_str)
-        
-        # Strip leading spaces and quotes
-        prompt = prompt.lstrip()
-        prompt = prompt.replace('"', '')        
-        
-        # Return the parameters
-        if frame < current_frame:
-            previous_prompt = prompt
-            previous_keyframe = frame
-            #print(f"[Debug] frame < current_frame, frame {frame}, current frame {current_frame}")
-            #print(f"[Debug] frame < current_frame, prompt {prompt}")
-            continue
-        if frame == current_frame:
-            next_prompt = prompt
-            next_keyframe = frame             
-            previous_prompt = prompt
-            previous_keyframe = frame
-            #print(f"[Debug] frame = current_frame, frame {frame}, current frame {current_frame}, next keyframe {next_keyframe}")
-            #print(f"[Debug] frame = current_frame, prompt {prompt}")            
-        else:
-            next_prompt = prompt
-            next_keyframe = frame            
-            prompt = previous_prompt
-            #print(f"[Debug] frame > current_frame, frame {frame}, current frame {current_frame}, next keyframe {next_keyframe}")
-            #print(f"[Debug] frame > current_frame, next prompt {next_prompt}")                
-            
-        return prompt, next_prompt, previous_keyframe, next_keyframe
-            
-    # Continue using the final params after the last schedule line has been evaluated     
-    return previous_prompt, previous_prompt, previous_keyframe, previous_keyframe
\ No newline at end of file
+def clear_conditioning_cache():
+    conditioning_cache.clear()
@@ -0,0 +1,82 @@
+#---------------------------------------------------------------------------------------------------------------------#
+# Comfyroll Studio custom nodes by RockOfFire and Akatsuzi    https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes
+# for ComfyUI                                                 https://github.com/comfyanonymous/ComfyUI
+#---------------------------------------------------------------------------------------------------------------------#
+
+import os
+import numpy as np
+from ..config import STYLES
+
+colormap_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "colormaps")
+style_lut_file = os.path.join(colormap_dir, "style_luts.npz")
+
+# Loaded on first use: style name -> (N, 3) uint8 lookup table
+style_luts = {}
+
+
+def build_style_luts(styles=STYLES, path=style_lut_file):
+    """
+    Regenerate the colormap asset from matplotlib.
+
+    Only needed when STYLES changes. Tables keep the native size of each
+    colormap (256 for most, fewer for qualitative maps, 510 for twilight) and
+    are padded to the largest one so they fit in a single array.
+    """
+    from matplotlib import colormaps
+
+    cmaps = [colormaps[style] for style in styles]
+    sizes = np.array([cmap.N for cmap in cmaps], dtype=np.uint16)
+    luts = np.zeros((len(styles), sizes.max(), 3), dtype=np.uint8)
+
+    for i, cmap in enumerate(cmaps):
+        luts[i, :cmap.N] = cmap(np.arange(cmap.N), bytes=True)[:, :3]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(path, names=np.array(styles), sizes=sizes, luts=luts)
+
+
+def load_style_luts(path=style_lut_file):
+    if not style_luts and os.path.isfile(path):
+        with np.load(path) as data:
+            for name, size, lut in zip(data["names"], data["sizes"], data["luts"]):
+                style_luts[str(name)] = lut[:size]
+    return style_luts
+
+
+def get_style_lut(style, reverse=False):
+    luts = load_style_luts()
+
+    lut = luts.get(style)
+    if lut is None:
+        # Fall back to matplotlib for names missing from the asset
+        from matplotlib import colormaps
+        cmap = colormaps[style]
+        lut = cmap(np.arange(cmap.N), bytes=True)[:, :3]
+        luts[style] = lut
+
+    if reverse:
+        lut = lut[::-1]
+    return lut
+
+
+def apply_style(values, style, reverse=False):
+    """
+    Map a scalar field through a named colormap, normalizing to the field's
+    min and max the same way imshow does.
+
+    Returns a uint8 RGB array with shape values.shape + (3,).
+    """
+    lut = get_style_lut(style, reverse)
+    size = len(lut)
+
+    values = np.asarray(values, dtype=np.float64)
+    vmin = values.min()
+    vmax = values.max()
+
+    if vmax == vmin:
+        normalized = np.zeros_like(values)
+    else:
+        normalized = (values - vmin) / (vmax - vmin)
+
+    index = np.clip((normalized * size).astype(np.intp), 0, size - 1)
+    return lut[index]
@@ -0,0 +1,107 @@
+#---------------------------------------------------------------------------------------------------------------------#
+# Comfyroll Studio custom nodes by RockOfFire and Akatsuzi    https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes
+# for ComfyUI                                                 https://github.com/comfyanonymous/ComfyUI
+#---------------------------------------------------------------------------------------------------------------------#
+# Shared tensor <-> PIL conversions used by the graphics, list and upscale nodes
+
+import numpy as np
+import torch
+from PIL import Image
+
+# Set to True to print the number of full-size buffers each conversion allocates
+debug_copies = False
+
+# Running totals per function, updated only while debug_copies is enabled
+copy_counts = {}
+
+
+def report_copies(function_name, copies, shape):
+    if not debug_copies:
+        return
+    calls, total = copy_counts.get(function_name, (0, 0))
+    copy_counts[function_name] = (calls + 1, total + copies)
+    print(f"[Debug] CR Conversion: {function_name} made {copies} full-size copies for shape {tuple(shape)}")
+
+
+def quantize(images):
+    """
+    Scale a float image tensor in [0, 1] to uint8, on the CPU.
+
+    Only the scaled copy and the uint8 copy are allocated, clamping is done in place.
+    Returns the uint8 tensor and the number of full-size copies made.
+    """
+    images = images.detach()
+    copies = 2
+
+    if images.device.type != "cpu" or images.dtype != torch.float32:
+        images = images.to("cpu", torch.float32)
+        copies += 1
+
+    scaled = images.mul(255.0)
+    scaled.clamp_(0, 255)
+    return scaled.to(torch.uint8), copies
+
+
+def pil_to_array(image):
+    # np.array copies the PIL buffer once into a writable array that torch can view
+    array = np.array(image)
+    if array.dtype == np.bool_:
+        array = array.astype(np.uint8)
+    elif array.dtype not in (np.uint8, np.float32, np.int32):
+        array = array.astype(np.float32)
+    return array
+
+
+def tensor2pil(image):
+    array, copies = quantize(image)
+    report_copies("tensor2pil", copies, array.shape)
+    return Image.fromarray(array.numpy().squeeze())
+
+
+def pil2tensor(image):
+    array = pil_to_array(image)
+    tensor = torch.from_numpy(array).to(torch.float32)
+    copies = 2 if array.dtype != np.float32 else 1
+    tensor.div_(255.0)
+    report_copies("pil2tensor", copies, tensor.shape)
+    return tensor.unsqueeze(0)
+
+
+def tensor_batch_to_pil_list(images):
+    """
+    Convert an IMAGE [B,H,W,C] or MASK [B,H,W] batch to a list of PIL images,
+    quantizing the whole batch at once.
+    """
+    if images.ndim == 2:
+        images = images.unsqueeze(0)
+
+    array, copies = quantize(images)
+    report_copies("tensor_batch_to_pil_list", copies, array.shape)
+
+    array = array.numpy()
+    if array.ndim == 4 and array.shape[-1] == 1:
+        array = array[..., 0]
+    return [Image.fromarray(frame) for frame in array]
+
+
+def pil_list_to_tensor_batch(images):
+    """
+    Convert a list of same-sized PIL images to one [B,H,W,C] float tensor.
+
+    The output is allocated once and each frame is copied straight into its slot.
+    """
+    if len(images) == 0:
+        raise ValueError("pil_list_to_tensor_batch needs at least one image")
+
+    first = pil_to_array(images[0])
+    batch = torch.empty((len(images),) + first.shape, dtype=torch.float32)
+
+    for i, image in enumerate(images):
+        array = first if i == 0 else pil_to_array(image)
+        if array.shape != first.shape:
+            raise ValueError(f"All images must have the same size and mode, got {array.shape} and {first.shape}")
+        batch[i].copy_(torch.from_numpy(array))
+
+    batch.div_(255.0)
+    report_copies("pil_list_to_tensor_batch", 2, batch.shape)
+    return batch
@@ -0,0 +1,135 @@
+#---------------------------------------------------------------------------------------------------------------------#
+# Comfyroll Studio custom nodes by RockOfFire and Akatsuzi    https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes
+# for ComfyUI                                                 https://github.com/comfyanonymous/ComfyUI
+#---------------------------------------------------------------------------------------------------------------------#
+# Per-process font registry shared by the text, layout and template nodes
+
+from collections import OrderedDict
+from PIL import ImageFont
+
+# Loaded FreeTypeFont objects kept between runs, keyed by (path, size)
+max_cached_fonts = 64
+
+# Measured text boxes kept between runs, keyed by (path, size, text, font mode)
+max_cached_metrics = 4096
+
+font_cache = OrderedDict()
+metric_cache = OrderedDict()
+
+font_stats = {"font_hits": 0, "font_misses": 0, "metric_hits": 0, "metric_misses": 0, "fit_calls": 0, "fit_probes": 0}
+
+
+def get_font(font_path, font_size):
+    """
+    Return a FreeTypeFont for the given file and size, parsing the file only on the first request.
+    """
+    key = (str(font_path), int(font_size))
+
+    font = font_cache.get(key)
+    if font is not None:
+        font_stats["font_hits"] += 1
+        font_cache.move_to_end(key)
+        return font
+
+    font_stats["font_misses"] += 1
+    font = ImageFont.truetype(key[0], size=key[1])
+
+    font_cache[key] = font
+    while len(font_cache) > max_cached_fonts:
+        font_cache.popitem(last=False)
+
+    return font
+
+
+def get_text_bbox(draw, text, font):
+    """
+    Memoized draw.textbbox((0, 0), text, font=font).
+
+    The box only depends on the font, the text and the draw's font mode, so it is
+    measured once per combination. The key holds the font's path and size rather
+    than the font, so fonts dropped from font_cache are not kept alive here.
+    """
+    key = (font.path, font.size, text, draw.fontmode)
+
+    bbox = metric_cache.get(key)
+    if bbox is not None:
+        font_stats["metric_hits"] += 1
+        metric_cache.move_to_end(key)
+        return bbox
+
+    font_stats["metric_misses"] += 1
+    bbox = draw.textbbox((0, 0), text, font=font)
+
+    metric_cache[key] = bbox
+    while len(metric_cache) > max_cached_metrics:
+        metric_cache.popitem(last=False)
+
+    return bbox
+
+
+def fit_font_size(draw, text, font_path, max_width, max_height, max_font_size, predict=True):
+    """
+    Find the largest font size in [1, max_font_size] at which text fits in max_width x max_height.
+
+    Sizes are binary searched, so the number of probes grows with log2(max_font_size).
+    With predict on, the first probes are scaled from the metrics at max_font_size,
+    which usually lands on or next to the answer.
+    Returns the font and the number of sizes measured.
+    """
+    probes = 0
+
+    def measure(size):
+        nonlocal probes
+        probes += 1
+        bbox = get_text_bbox(draw, text, get_font(font_path, size))
+        width = bbox[2] - bbox[0]
+        height = bbox[3] - bbox[1]
+        return width, height, width <= max_width and height <= max_height
+
+    low, high = 1, max(int(max_font_size), 1)
+
+    width, height, fits = measure(high)
+    if not fits:
+        high -= 1
+
+        # Text size scales close to linearly with the font size
+        if predict and width > 0 and height > 0 and low <= high:
+            guess = int(max_font_size * min(max_width / width, max_height / height))
+            guess = min(max(guess, low), high)
+            # Probe next to the guess as well, which closes the range when the guess is exact
+            if measure(guess)[2]:
+                low = guess
+                if guess < high and not measure(guess + 1)[2]:
+                    high = guess
+            else:
+                high = guess - 1
+                if low <= high and measure(high)[2]:
+                    low = high
+
+        while low < high:
+            middle = (low + high + 1) // 2
+            if measure(middle)[2]:
+                low = middle
+            else:
+                high = middle - 1
+    else:
+        low = high
+
+    font_stats["fit_calls"] += 1
+    font_stats["fit_probes"] += probes
+
+    return get_font(font_path, max(low, 1)), probes
+
+
+def font_cache_info():
+    info = dict(font_stats)
+    info["fonts"] = len(font_cache)
+    info["metrics"] = len(metric_cache)
+    return info
+
+
+def clear_font_cache():
+    font_cache.clear()
+    metric_cache.clear()
+    for key in font_stats:
+        font_stats[key] = 0
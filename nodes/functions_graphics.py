@@ -9,19 +9,13 @@ import os
 import random
 from PIL import Image, ImageDraw, ImageFont, ImageOps, ImageEnhance
 from ..config import color_mapping
+from .functions_conversion import tensor2pil, pil2tensor, tensor_batch_to_pil_list, pil_list_to_tensor_batch
+from .functions_fonts import get_font, get_text_bbox, fit_font_size
 
 font_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "fonts")       
 file_list = [f for f in os.listdir(font_dir) if os.path.isfile(os.path.join(font_dir, f)) and f.lower().endswith(".ttf")]
 
 
-def tensor2pil(image):
-    return Image.fromarray(np.clip(255. * image.cpu().numpy().squeeze(), 0, 255).astype(np.uint8))
-
-
-def pil2tensor(image):
-    return torch.from_numpy(np.array(image).astype(np.float32) / 255.0).unsqueeze(0) 
-
-
 def align_text(align, img_height, text_height, text_pos_y, margins):
     if align == "center":
         text_plot_y = img_height / 2 - text_height / 2 + text_pos_y
@@ -43,7 +37,7 @@ def justify_text(justify, img_width, line_width, margins):
 
 
 def get_text_size(draw, text, font):
-    bbox = draw.textbbox((0, 0), text, font=font)
+    bbox = get_text_bbox(draw, text, font)
 
     # Calculate the text width and height
     text_width = bbox[2] - bbox[0]
@@ -65,7 +59,7 @@ def draw_masked_text(text_mask, text,
     font_folder = "fonts"
     font_file = os.path.join(font_folder, font_name)
     resolved_font_path = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), font_file)
-    font = ImageFont.truetype(str(resolved_font_path), size=font_size) 
+    font = get_font(resolved_font_path, font_size)
 
      # Split the input text into lines
     text_lines = text.split('\n')
@@ -168,14 +162,14 @@ def get_font_size(draw, text, max_width, max_height, font_path, max_font_size):
     
     # Start with the maximum font size
     font_size = max_font_size
-    font = ImageFont.truetype(str(font_path), size=font_size)
+    font = get_font(font_path, font_size)
 
      # Get the first two lines
     text_lines = text.split('\n')[:2]
     
     if len(text_lines) == 2:
         font_size = min(max_height//2, max_font_size)        
-        font = ImageFont.truetype(str(font_path), size=font_size)
+        font = get_font(font_path, font_size)
         
     # Calculate max text width and height with the current font
     max_text_width = 0
@@ -190,13 +184,13 @@ def get_font_size(draw, text, max_width, max_height, font_path, max_font_size):
     
     # Calculate the width and height of the text
     text_width, text_height = get_text_size(draw, text, font)
-    
-    # Decrease the font size until it fits within the bounds
-    while max_text_width > max_width or text_height > 0.88 * max_height / len(text_lines):
-        font_size -= 1
-        font = ImageFont.truetype(str(font_path), size=font_size)
-        max_text_width, text_height = get_text_size(draw, longest_line, font)
-    
+    max_line_height = 0.88 * max_height / len(text_lines)
+
+    if max_text_width <= max_width and text_height <= max_line_height:
+        return font
+
+    # Binary search the largest smaller size at which the longest line fits
+    font, _ = fit_font_size(draw, longest_line, font_path, max_width, max_line_height, font_size - 1)
     return font
 
 
@@ -257,7 +251,7 @@ def draw_text(panel, text,
     font_folder = "fonts"
     font_file = os.path.join(font_folder, font_name)
     resolved_font_path = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), font_file)
-    font = ImageFont.truetype(str(resolved_font_path), size=font_size) 
+    font = get_font(resolved_font_path, font_size)
 
      # Split the input text into lines
     text_lines = text.split('\n')
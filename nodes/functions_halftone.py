@@ -0,0 +1,161 @@
+#---------------------------------------------------------------------------------------------------------------------#
+# Comfyroll Studio custom nodes by RockOfFire and Akatsuzi    https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes
+# for ComfyUI                                                 https://github.com/comfyanonymous/ComfyUI
+#---------------------------------------------------------------------------------------------------------------------#
+# Halftone engine for CR Halftone Filter
+
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageDraw
+
+
+def cell_means(channel, sample):
+    """
+    Mean level of every sample x sample cell of a 2D uint8 array, in one reshape.
+
+    Cells that run past the edge are padded with black, matching a PIL crop.
+    """
+    height, width = channel.shape
+    rows = -(-height // sample)
+    cols = -(-width // sample)
+
+    padded = np.zeros((rows * sample, cols * sample), dtype=np.float64)
+    padded[:height, :width] = channel
+
+    return padded.reshape(rows, sample, cols, sample).mean(axis=(1, 3))
+
+
+def blend_border_cells(means, channel, sample):
+    """
+    Replace the means of the border cells with a weighted 3x3 neighbourhood average,
+    so rotated edges do not pick up the black padding.
+    """
+    height, width = channel.shape
+    rows, cols = means.shape
+    channel = channel.astype(np.float64)
+
+    # Only the first and last rows and columns of cells touch the edge
+    ys = np.arange(rows) * sample
+    xs = np.arange(cols) * sample
+    edge_rows = (ys < sample) | (ys > height - sample)
+    edge_cols = (xs < sample) | (xs > width - sample)
+
+    cells = [(row, col) for row in np.flatnonzero(edge_rows) for col in range(cols)]
+    cells += [(row, col) for row in np.flatnonzero(~edge_rows) for col in np.flatnonzero(edge_cols)]
+
+    for row, col in cells:
+        y = row * sample
+        x = col * sample
+        pixels = channel[max(y - 1, 0):min(y + 2, height), max(x - 1, 0):min(x + 2, width)].ravel()
+        weights = np.ones(len(pixels))
+        weights[0] = weights[-1] = 0.5
+        means[row, col] = (pixels * weights).sum() / weights.sum()
+
+    return means
+
+
+def rasterize_dots(means, sample, scale, shape):
+    """
+    Draw one dot per cell, pixel for pixel as ImageDraw drew them one at a time.
+
+    A dot only depends on its cell's level, and cells start on whole pixels, so each
+    distinct level is drawn once with ImageDraw into a small stamp and the stamps are
+    tiled into the canvas with one reshape. ImageDraw's boxes are inclusive, so a stamp
+    is one pixel wider than its cell and its last row and column are merged into the
+    neighbouring cells.
+    """
+    if shape not in ("ellipse", "rectangle"):
+        raise ValueError(f"Unsupported dot shape: {shape}")
+
+    box_size = sample * scale
+    rows, cols = means.shape
+
+    # Diameter or side length of each dot, from the level (0-1)
+    levels, inverse = np.unique(means, return_inverse=True)
+    draw_sizes = (levels / 255) ** 0.5 * box_size
+
+    stamps = np.empty((len(levels), box_size + 1, box_size + 1), dtype=np.uint8)
+    stamp = Image.new("L", (box_size + 1, box_size + 1))
+    draw = ImageDraw.Draw(stamp)
+    draw_method = getattr(draw, shape)
+    for index, draw_size in enumerate(draw_sizes):
+        draw.rectangle([(0, 0), stamp.size], fill=0)
+        offset = (box_size - draw_size) / 2
+        draw_method([(offset, offset), (offset + draw_size, offset + draw_size)], fill=255)
+        stamps[index] = np.asarray(stamp)
+
+    cells = stamps[inverse.reshape(-1)].reshape(rows, cols, box_size + 1, box_size + 1)
+
+    canvas = np.zeros((rows * box_size + 1, cols * box_size + 1), dtype=np.uint8)
+    canvas[:-1, :-1] = cells[:, :, :-1, :-1].transpose(0, 2, 1, 3).reshape(rows * box_size, cols * box_size)
+    # Last column of each stamp goes into the first column of the next cell, and likewise for rows
+    canvas[:-1, box_size::box_size] |= cells[:, :, :-1, -1].transpose(0, 2, 1).reshape(rows * box_size, cols)
+    canvas[box_size::box_size, :-1] |= cells[:, :, -1, :-1].reshape(rows, cols * box_size)
+    canvas[box_size::box_size, box_size::box_size] |= cells[:, :, -1, -1]
+    return canvas
+
+
+def halftone_channel(channel, angle, sample, scale, antialias_scale, border_blending, shape, output_size):
+    """
+    Halftone a single "L" channel at the given screen angle.
+
+    scale already includes the antialias factor; the result is scaled back down by
+    antialias_scale when it is greater than 1.
+    """
+    rotated = np.asarray(channel.rotate(angle, expand=1))
+    height, width = rotated.shape
+
+    means = cell_means(rotated, sample)
+    if border_blending and angle % 90 != 0:
+        means = blend_border_cells(means, rotated, sample)
+
+    dots = rasterize_dots(means, sample, scale, shape)
+    half_tone = Image.fromarray(dots[:height * scale, :width * scale])
+
+    half_tone = half_tone.rotate(-angle, expand=1)
+    width_half, height_half = half_tone.size
+
+    # Crop back to the original image area
+    xx1 = (width_half - output_size[0] * scale) / 2
+    yy1 = (height_half - output_size[1] * scale) / 2
+    xx2 = xx1 + output_size[0] * scale
+    yy2 = yy1 + output_size[1] * scale
+    half_tone = half_tone.crop((xx1, yy1, xx2, yy2))
+
+    if antialias_scale > 1:
+        # Scale it back down to antialias the image
+        w = int((xx2 - xx1) / antialias_scale)
+        h = int((yy2 - yy1) / antialias_scale)
+        half_tone = half_tone.resize((w, h), resample=Image.LANCZOS)
+
+    return half_tone
+
+
+def halftone_image(image, sample, scale, angles, greyscale, antialias, antialias_scale, border_blending, shape):
+    """
+    Apply a greyscale or CMYK halftone to one RGB PIL image.
+
+    CMYK channels are screened in parallel; numpy and PIL release the GIL for the heavy work.
+    """
+    antialias_res = antialias_scale if antialias else 1
+    scale = scale * antialias_res
+
+    if greyscale:
+        channels = [image.convert("L")]
+        angles = angles[-1:]
+    else:
+        channels = list(image.convert("CMYK").split())
+
+    def screen(channel_and_angle):
+        channel, angle = channel_and_angle
+        return halftone_channel(channel, angle, sample, scale, antialias_res, border_blending, shape, image.size)
+
+    if len(channels) > 1:
+        with ThreadPoolExecutor(max_workers=len(channels)) as executor:
+            half_tones = list(executor.map(screen, zip(channels, angles)))
+    else:
+        half_tones = [screen((channels[0], angles[0]))]
+
+    if greyscale:
+        return half_tones[0].convert("RGB")
+    return Image.merge("CMYK", half_tones).convert("RGB")
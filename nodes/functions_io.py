@@ -0,0 +1,269 @@
+#---------------------------------------------------------------------------------------------------------------------#
+# Comfyroll Studio custom nodes by RockOfFire and Akatsuzi    https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes
+# for ComfyUI                                                 https://github.com/comfyanonymous/ComfyUI
+#---------------------------------------------------------------------------------------------------------------------#
+# Image file loading shared by the animation and list IO nodes
+
+import os
+import re
+import time
+import numpy as np
+import torch
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+
+# Upper bound on decoder threads, PIL releases the GIL while decoding
+max_decode_workers = min(16, os.cpu_count() or 1)
+
+# Sorted folder listings, folder -> (mtime, names), rescanned when the folder's mtime changes
+directory_listings = {}
+
+# Subfolders of the input and output folders listed by INPUT_TYPES,
+# parent -> (mtime, sorted names, {name: (mtime, has entries)})
+folder_indexes = {}
+
+# Animated images left open at their last frame, path -> (mtime, image), so the next
+# window of a GIF, WebP or APNG carries on from there instead of walking the file from frame 0
+max_open_animations = 4
+
+animation_readers = OrderedDict()
+
+# Recently decoded flow frames, (path, mtime) -> [1,H,W,3] tensor. The frame loaded as the
+# current frame on one step is the previous frame on the next, so it is only decoded once.
+max_buffered_frames = 4
+
+frame_buffer = OrderedDict()
+
+natural_sort_pattern = re.compile(r'(\D+)(\d+)')
+
+
+def natural_sort_key(name):
+    # Runs of text compare as strings and runs of digits as numbers, so frame_2 sorts before frame_10
+    return tuple(part for text, number in natural_sort_pattern.findall('a%s0' % name) for part in (text, int(number)))
+
+
+def list_directory(folder):
+    """
+    Return the names in a folder in natural sort order, scanning the folder only when its mtime has changed.
+    """
+    folder = os.path.realpath(folder)
+    mtime = os.stat(folder).st_mtime_ns
+
+    cached = directory_listings.get(folder)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    names = tuple(sorted(os.listdir(folder), key=natural_sort_key))
+    directory_listings[folder] = (mtime, names)
+    return names
+
+
+def decode_rgb(path):
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def load_frames(paths, max_workers=None, node_name="CR Load Frames"):
+    """
+    Decode a list of image files into one [N,H,W,3] float tensor.
+
+    The output is allocated once from the size of the first frame and the other
+    frames are decoded on a thread pool, each straight into its own slot. The workers
+    only copy 8-bit pixels in; the batch is scaled to 0-1 on the calling thread, since
+    inference mode does not carry over to the pool threads.
+    Returns the batch and the decode time of each frame in seconds.
+    """
+    if len(paths) == 0:
+        raise ValueError(f"{node_name}: no frames to load")
+
+    start = time.perf_counter()
+    first = decode_rgb(paths[0])
+    timings = [time.perf_counter() - start]
+
+    batch = torch.empty((len(paths),) + first.shape, dtype=torch.float32)
+
+    def fill(index, array):
+        if array.shape != first.shape:
+            raise ValueError(f"{node_name}: {os.path.basename(paths[index])} is {array.shape[1]}x{array.shape[0]}, "
+                             f"expected {first.shape[1]}x{first.shape[0]}")
+        np.copyto(batch[index].numpy(), array)
+
+    def decode_into(index):
+        frame_start = time.perf_counter()
+        fill(index, decode_rgb(paths[index]))
+        return time.perf_counter() - frame_start
+
+    fill(0, first)
+
+    workers = max(1, min(max_workers or max_decode_workers, len(paths) - 1))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        timings.extend(executor.map(decode_into, range(1, len(paths))))
+
+    batch.div_(255.0)
+
+    total = time.perf_counter() - start
+    print(f"[Info] {node_name}: Loaded {len(paths)} frames in {total:.2f}s "
+          f"({1000 * sum(timings) / len(timings):.1f} ms per frame, {workers} threads)")
+
+    return batch, timings
+
+
+def folder_has_entries(folder):
+    # Stops at the first entry, however many files the folder holds
+    with os.scandir(folder) as entries:
+        return next(entries, None) is not None
+
+
+def list_subfolders(parent, non_empty=False):
+    """
+    Return the sorted names of the subfolders of parent for the INPUT_TYPES folder lists.
+
+    The parent is only rescanned when its mtime changes. With non_empty on, empty
+    folders are left out; each subfolder is checked again only when its own mtime
+    changes, and the check reads a single entry instead of listing the folder.
+    """
+    mtime = os.stat(parent).st_mtime_ns
+
+    index = folder_indexes.get(parent)
+    if index is None or index[0] != mtime:
+        with os.scandir(parent) as entries:
+            names = sorted(entry.name for entry in entries if entry.is_dir())
+        index = (mtime, names, {})
+        folder_indexes[parent] = index
+
+    _, names, contents = index
+    if not non_empty:
+        return list(names)
+
+    folders = []
+    for name in names:
+        folder = os.path.join(parent, name)
+        try:
+            folder_mtime = os.stat(folder).st_mtime_ns
+        except OSError:
+            continue
+        known = contents.get(name)
+        if known is None or known[0] != folder_mtime:
+            known = (folder_mtime, folder_has_entries(folder))
+            contents[name] = known
+        if known[1]:
+            folders.append(name)
+    return folders
+
+
+def image_tensors(image, with_mask=False):
+    """
+    Convert a loaded PIL image into a [1,H,W,3] float tensor, and optionally a [1,H,W]
+    mask taken from the first channel of the same pixels.
+    """
+    pixels = np.asarray(image) if with_mask or image.mode in ("RGB", "RGBA") else None
+    if image.mode == "RGB":
+        rgb = pixels
+    elif image.mode == "RGBA":
+        rgb = pixels[..., :3]
+    else:
+        rgb = np.asarray(image.convert("RGB"))
+
+    out = torch.empty((1,) + rgb.shape, dtype=torch.float32)
+    np.copyto(out[0].numpy(), rgb)
+    out.div_(255.0)
+
+    if not with_mask:
+        return out, None
+
+    channel = pixels if pixels.ndim == 2 else pixels[..., 0]
+    mask = torch.from_numpy(channel.astype(np.float32)).div_(255.0).unsqueeze(0)
+    return out, mask
+
+
+def decode_image(path, with_mask=False):
+    with Image.open(path) as image:
+        image.load()
+        return image_tensors(image, with_mask)
+
+
+def load_buffered_frame(path):
+    """
+    Return a [1,H,W,3] tensor for an image file, decoding it only if it is not among the last max_buffered_frames frames.
+    """
+    key = (os.path.realpath(path), os.stat(path).st_mtime_ns)
+
+    frame = frame_buffer.get(key)
+    if frame is not None:
+        frame_buffer.move_to_end(key)
+        return frame
+
+    frame, _ = decode_image(path)
+    frame_buffer[key] = frame
+    while len(frame_buffer) > max_buffered_frames:
+        frame_buffer.popitem(last=False)
+    return frame
+
+
+def load_image_list(paths, with_masks=False, max_workers=None):
+    """
+    Decode image files on a thread pool into one tensor per image, in the order of paths.
+
+    Images may differ in size. Returns the list of images and, with with_masks on,
+    the list of masks (otherwise an empty list).
+    """
+    if len(paths) == 0:
+        return [], []
+
+    workers = max(1, min(max_workers or max_decode_workers, len(paths)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        decoded = list(executor.map(lambda path: decode_image(path, with_masks), paths))
+
+    images = [image for image, _ in decoded]
+    masks = [mask for _, mask in decoded] if with_masks else []
+    return images, masks
+
+
+def read_animation_frames(path, start_frame, max_frames, with_masks=False):
+    """
+    Decode up to max_frames frames of an animated GIF, WebP or PNG from start_frame on.
+
+    Returns the list of [1,H,W,3] frames and, with with_masks on, the list of masks.
+    The reader is kept open at the last frame it read, so a window that starts at or
+    after that frame only decodes the frames in between and the window itself. Frames
+    of these formats are composited over the previous ones, so an earlier start frame
+    has to be replayed from the beginning of the file.
+    """
+    path = os.path.realpath(path)
+    mtime = os.stat(path).st_mtime_ns
+
+    cached = animation_readers.pop(path, None)
+    image = None
+    if cached is not None:
+        if cached[0] == mtime and cached[1].tell() <= start_frame:
+            image = cached[1]
+        else:
+            cached[1].close()
+    if image is None:
+        image = Image.open(path)
+
+    images = []
+    masks = []
+    try:
+        for index in range(start_frame, start_frame + max_frames):
+            if index != image.tell():
+                try:
+                    image.seek(index)
+                except EOFError:
+                    break
+            image.load()
+            frame, mask = image_tensors(image, with_masks)
+            images.append(frame)
+            if with_masks:
+                masks.append(mask)
+    except Exception:
+        image.close()
+        raise
+
+    animation_readers[path] = (mtime, image)
+    while len(animation_readers) > max_open_animations:
+        _, (_, evicted) = animation_readers.popitem(last=False)
+        evicted.close()
+
+    return images, masks
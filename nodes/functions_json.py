@@ -29,32 +29,107 @@ def read_json_file(file_path):
         return None
 
 #---------------------------------------------------------------------------------------------------------------------#
-def load_styles_from_directory(directory):
+# Style records per file, path -> (mtime, size, [[name, prompt, negative_prompt], ...])
+style_files = {}
+
+# Deduplicated styles per directory, directory -> (file signature, [names], {name: (prepend, append, negative)})
+style_indexes = {}
+
+# Compact copy of style_files kept in the styles directory, so a restart does not re-read every file
+style_cache_name = ".cr_style_cache"
+
+def split_style(prompt, negative_prompt):
     """
-    Loads styles from all JSON files in the directory.
-    Renames duplicate style names by appending a suffix.
+    Split a style's prompt around its {prompt} placeholder into (prepend, append, negative).
+    """
+    prepend, _, append = str(prompt).partition("{prompt}")
+    return prepend, append.replace(" . ", ""), str(negative_prompt)
+
+def valid_style_entry(entry):
+    # (mtime, size, [[name, prompt, negative_prompt], ...]) as written by write_style_cache
+    return (isinstance(entry, list) and len(entry) == 3
+            and isinstance(entry[0], int) and isinstance(entry[1], int) and isinstance(entry[2], list)
+            and all(isinstance(record, list) and len(record) == 3 and isinstance(record[0], (str, int, float))
+                    for record in entry[2]))
+
+def read_style_cache(directory):
+    # Entries that are stale in shape or were edited by hand are dropped, their files are just read again
+    try:
+        with open(os.path.join(directory, style_cache_name), 'r', encoding='utf-8') as file:
+            entries = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(entries, dict):
+        return {}
+    return {os.path.join(directory, name): tuple(entry) for name, entry in entries.items()
+            if isinstance(name, str) and os.path.basename(name) == name and valid_style_entry(entry)}
+
+def write_style_cache(directory, entries):
+    # Best effort, a read-only styles directory just means no persisted cache
+    cache_path = os.path.join(directory, style_cache_name)
+    try:
+        with open(cache_path + ".tmp", 'w', encoding='utf-8') as file:
+            json.dump({os.path.basename(path): entry for path, entry in entries.items()}, file, separators=(',', ':'))
+        os.replace(cache_path + ".tmp", cache_path)
+    except OSError:
+        pass
+
+def get_style_index(directory):
     """
-    #json_files = get_all_json_files(directory)
-    json_files = [os.path.join(directory, file) for file in os.listdir(directory) if file.endswith('.json') and os.path.isfile(os.path.join(directory, file))]
-    combined_data = []
-    seen = set()
-
-    for json_file in json_files:
-        json_data = read_json_file(json_file)
-        if json_data:
-            for item in json_data:
-                original_style = item['name']
-                style = original_style
-                suffix = 1
-                while style in seen:
-                    style = f"{original_style}_{suffix}"
-                    suffix += 1
-                item['name'] = style
-                seen.add(style)
-                combined_data.append(item)
-
-    unique_style_names = [item['name'] for item in combined_data if isinstance(item, dict) and 'name' in item]
-    
-    return combined_data, unique_style_names
+    Return ([style names], {name: (prepend, append, negative)}) for all JSON files in the directory.
+
+    Files are only read again when their mtime or size changes; the parsed records are
+    also persisted in the directory so a restart does not re-read them. Duplicate
+    style names get a "_1", "_2", ... suffix in file order.
+    """
+    directory = os.path.normpath(directory)
+    with os.scandir(directory) as entries:
+        files = [(entry.path, entry.stat()) for entry in entries if entry.name.endswith('.json') and entry.is_file()]
+    signature = tuple((path, stat.st_mtime_ns, stat.st_size) for path, stat in files)
+
+    index = style_indexes.get(directory)
+    if index is not None and index[0] == signature:
+        return index[1], index[2]
+
+    known = [path for path in style_files if os.path.dirname(path) == directory]
+    if not known:
+        style_files.update(read_style_cache(directory))
+        known = [path for path in style_files if os.path.dirname(path) == directory]
+
+    # Forget files that were removed, and re-read the ones that changed
+    current = set(path for path, _, _ in signature)
+    changed = False
+    for path in known:
+        if path not in current:
+            del style_files[path]
+            changed = True
+
+    for path, mtime, size in signature:
+        cached = style_files.get(path)
+        if cached is None or cached[0] != mtime or cached[1] != size:
+            content = read_json_file(path)
+            records = [[item['name'], item['prompt'], item['negative_prompt']] for item in content] if content else []
+            style_files[path] = (mtime, size, records)
+            changed = True
+
+    if changed:
+        write_style_cache(directory, {path: style_files[path] for path, _, _ in signature})
+
+    names = []
+    styles = {}
+    next_suffix = {}
+    for path, _, _ in signature:
+        for name, prompt, negative_prompt in style_files[path][2]:
+            style = name
+            suffix = next_suffix.get(name, 1)
+            while style in styles:
+                style = f"{name}_{suffix}"
+                suffix += 1
+            next_suffix[name] = suffix
+            names.append(style)
+            styles[style] = split_style(prompt, negative_prompt)
+
+    style_indexes[directory] = (signature, names, styles)
+    return names, styles
 
 #---------------------------------------------------------------------------------------------------------------------#
@@ -0,0 +1,34 @@
+#---------------------------------------------------------------------------------------------------------------------#
+# Comfyroll Studio custom nodes by RockOfFire and Akatsuzi    https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes
+# for ComfyUI                                                 https://github.com/comfyanonymous/ComfyUI
+#---------------------------------------------------------------------------------------------------------------------#
+# Latent batching for CR Latent Batch Size
+
+import torch
+
+
+def repeat_latent(samples, batch_size, mode="copy", noise_strength=0.0, seed=0):
+    """
+    Repeat a latent batch batch_size times along the batch dimension.
+
+    "view" returns an expanded view of a single latent that shares its memory, so it
+    must only be read. Batches of more than one latent cannot be viewed that way and
+    are copied. "copy" makes a single allocation for the whole result.
+
+    With noise_strength above 0 the result is always a copy and item i gets Gaussian
+    noise seeded with seed + i (wrapped to 64 bits), added in place one item at a time.
+    """
+    repeats = (batch_size,) + (1,) * (samples.ndim - 1)
+
+    if noise_strength == 0:
+        if mode == "view" and samples.shape[0] == 1:
+            return samples.expand(batch_size, *samples.shape[1:])
+        return samples.repeat(repeats)
+
+    out = samples.repeat(repeats)
+    generator = torch.Generator()
+    for index, item in enumerate(out):
+        generator.manual_seed((seed + index) % 2 ** 64)
+        noise = torch.randn(item.shape, generator=generator, dtype=item.dtype)
+        item.add_(noise.to(item.device), alpha=noise_strength)
+    return out
@@ -0,0 +1,40 @@
+#---------------------------------------------------------------------------------------------------------------------#
+# Comfyroll Studio custom nodes by RockOfFire and Akatsuzi    https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes
+# for ComfyUI                                                 https://github.com/comfyanonymous/ComfyUI
+#---------------------------------------------------------------------------------------------------------------------#
+
+import numpy as np
+import torch
+from contextlib import contextmanager
+
+# matplotlib is imported on first use so the Graphics nodes load without paying its startup cost
+
+
+@contextmanager
+def matplot_figure(width, height):
+    """
+    Create a figure sized in pixels at 100 dpi and always close it on exit,
+    so pyplot does not keep a reference to every figure a node has drawn.
+    """
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(width / 100, height / 100))
+    try:
+        yield fig, ax
+    finally:
+        plt.close(fig)
+
+
+def figure2tensor(fig):
+    """
+    Render a figure with the Agg backend and return it as a [1,H,W,3] image tensor.
+
+    Reads the RGBA canvas buffer directly instead of encoding and decoding a PNG.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    rgba = np.asarray(canvas.buffer_rgba())
+    image = rgba[:, :, :3].astype(np.float32) / 255.0
+    return torch.from_numpy(image).unsqueeze(0)
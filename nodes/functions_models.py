@@ -0,0 +1,308 @@
+#---------------------------------------------------------------------------------------------------------------------#
+# Comfyroll Studio custom nodes by RockOfFire and Akatsuzi    https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes
+# for ComfyUI                                                 https://github.com/comfyanonymous/ComfyUI
+#---------------------------------------------------------------------------------------------------------------------#
+# Process-wide caches for checkpoints and LoRAs loaded by the scheduler and LoRA nodes
+
+import os
+import threading
+import torch
+import comfy.sd
+import comfy.utils
+import folder_paths
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Number of (MODEL, CLIP, VAE) tuples kept resident between frames
+max_cached_checkpoints = 2
+
+# Total size of the resident checkpoints, measured by their file sizes
+checkpoint_cache_bytes = 16 * 1024 ** 3
+
+# key -> ((MODEL, CLIP, VAE), size in bytes)
+checkpoint_cache = OrderedDict()
+
+checkpoint_stats = {"loads": 0, "hits": 0, "evictions": 0, "warmed": 0}
+
+checkpoint_lock = threading.Lock()
+
+# Checkpoint files being read in the background, key -> Future of the state dict.
+# Only the disk read runs there; the models are built on the calling thread, because
+# comfy.model_management's bookkeeping of loaded models is not thread-safe.
+pending_checkpoints = {}
+
+warm_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="CR checkpoint warmer")
+
+# Total size of the LoRA tensors kept between queue items
+lora_cache_bytes = 2 * 1024 ** 3
+
+# Map .pt/.ckpt LoRAs from disk instead of reading them into memory.
+# Safetensors files are already read through a memory map by comfy.utils.load_torch_file.
+lora_mmap = False
+
+# (path, size, mtime) -> (state dict, size in bytes)
+lora_cache = OrderedDict()
+
+lora_stats = {"loads": 0, "hits": 0, "evictions": 0}
+
+lora_lock = threading.Lock()
+
+# State dict prefixes used by the streaming merge
+merge_model_prefix = "model.diffusion_model."
+merge_clip_prefixes = ("cond_stage_model.", "conditioner.", "text_encoders.")
+merge_skip_prefixes = ("first_stage_model.", "model_ema.")
+
+
+def checkpoint_key(ckpt_path):
+    # A checkpoint that is overwritten on disk gets a new key
+    ckpt_path = os.path.realpath(ckpt_path)
+    return ckpt_path, os.path.getmtime(ckpt_path)
+
+
+def read_checkpoint(ckpt_path, sd=None):
+    # Build the models from a state dict read in the background when there is one
+    embedding_directory = folder_paths.get_folder_paths("embeddings")
+    if sd is not None and hasattr(comfy.sd, "load_state_dict_guess_config"):
+        out = comfy.sd.load_state_dict_guess_config(sd, output_vae=True, output_clip=True,
+                                                    embedding_directory=embedding_directory)
+        if out is None:
+            raise RuntimeError(f"ERROR: Could not detect model type of: {ckpt_path}")
+    else:
+        out = comfy.sd.load_checkpoint_guess_config(ckpt_path, output_vae=True, output_clip=True,
+                                                    embedding_directory=embedding_directory)
+    return out[:3]
+
+
+def store_checkpoint(key, out):
+    # Must be called with checkpoint_lock held
+    checkpoint_cache[key] = (out, os.path.getsize(key[0]))
+    checkpoint_cache.move_to_end(key)
+
+    while len(checkpoint_cache) > 1 and (
+            len(checkpoint_cache) > max_cached_checkpoints or
+            sum(size for _, size in checkpoint_cache.values()) > checkpoint_cache_bytes):
+        evicted, _ = checkpoint_cache.popitem(last=False)
+        checkpoint_stats["evictions"] += 1
+        print(f"[Info] CR Checkpoint Cache: Evicted {os.path.basename(evicted[0])}")
+
+
+def load_checkpoint(ckpt_path):
+    """
+    Return (MODEL, CLIP, VAE) for a checkpoint, loading it only if it is not already resident.
+
+    If the checkpoint file is being read in the background, wait for that read and
+    build the models from it instead of reading the file again.
+    """
+    key = checkpoint_key(ckpt_path)
+    name = os.path.basename(key[0])
+
+    with checkpoint_lock:
+        cached = checkpoint_cache.get(key)
+        if cached is not None:
+            checkpoint_cache.move_to_end(key)
+            checkpoint_stats["hits"] += 1
+            return cached[0]
+        future = pending_checkpoints.pop(key, None)
+
+    sd = None
+    if future is not None:
+        try:
+            sd = future.result()
+        except Exception as e:
+            print(f"[Warning] CR Checkpoint Cache: Background read of {name} failed: {e}")
+
+    print(f"[Info] CR Checkpoint Cache: Loading {name}")
+    out = read_checkpoint(ckpt_path, sd)
+
+    with checkpoint_lock:
+        checkpoint_stats["loads"] += 1
+        if sd is not None:
+            checkpoint_stats["warmed"] += 1
+        store_checkpoint(key, out)
+    return out
+
+
+def warm_checkpoint(ckpt_path):
+    """
+    Start reading a checkpoint file in a background thread, so load_checkpoint only
+    has to build the models from it when it is needed.
+    """
+    if ckpt_path is None:
+        return
+
+    key = checkpoint_key(ckpt_path)
+
+    with checkpoint_lock:
+        if key in checkpoint_cache or key in pending_checkpoints:
+            return
+
+        # Only hold one read ahead, an earlier one that was never used is dropped
+        for stale in list(pending_checkpoints):
+            pending_checkpoints.pop(stale).cancel()
+
+        print(f"[Info] CR Checkpoint Cache: Reading {os.path.basename(key[0])} in the background")
+        pending_checkpoints[key] = warm_executor.submit(comfy.utils.load_torch_file, key[0], safe_load=True)
+
+
+def clear_checkpoint_cache():
+    with checkpoint_lock:
+        checkpoint_cache.clear()
+        for future in pending_checkpoints.values():
+            future.cancel()
+        pending_checkpoints.clear()
+
+
+def lora_key(lora_path):
+    lora_path = os.path.realpath(lora_path)
+    stat = os.stat(lora_path)
+    return lora_path, stat.st_size, stat.st_mtime
+
+
+def read_lora(lora_path):
+    if lora_mmap and not lora_path.lower().endswith(".safetensors"):
+        try:
+            return torch.load(lora_path, map_location="cpu", weights_only=True, mmap=True)
+        except (TypeError, RuntimeError):
+            # Older torch, or a legacy (non zip) checkpoint that cannot be mapped
+            pass
+    return comfy.utils.load_torch_file(lora_path, safe_load=True)
+
+
+def load_lora_file(lora_path):
+    """
+    Return the state dict of a LoRA file, reading it from disk only if it is not already cached.
+
+    Entries are keyed by path, size and mtime, and the least recently used are
+    evicted once the cached tensors exceed lora_cache_bytes.
+    """
+    key = lora_key(lora_path)
+
+    with lora_lock:
+        cached = lora_cache.get(key)
+        if cached is not None:
+            lora_cache.move_to_end(key)
+            lora_stats["hits"] += 1
+            return cached[0]
+
+    lora = read_lora(key[0])
+    size = sum(value.nbytes for value in lora.values() if isinstance(value, torch.Tensor))
+
+    with lora_lock:
+        lora_stats["loads"] += 1
+        lora_cache[key] = (lora, size)
+        while len(lora_cache) > 1 and sum(size for _, size in lora_cache.values()) > lora_cache_bytes:
+            evicted, _ = lora_cache.popitem(last=False)
+            lora_stats["evictions"] += 1
+            print(f"[Info] CR LoRA Cache: Evicted {os.path.basename(evicted[0])}")
+
+    return lora
+
+
+def apply_lora(model, clip, lora_name, strength_model, strength_clip):
+    # Same as LoraLoader.load_lora, but reuses cached LoRA tensors
+    if strength_model == 0 and strength_clip == 0:
+        return model, clip
+
+    lora = load_lora_file(folder_paths.get_full_path("loras", lora_name))
+    return comfy.sd.load_lora_for_models(model, clip, lora, strength_model, strength_clip)
+
+
+def clear_lora_cache():
+    with lora_lock:
+        lora_cache.clear()
+
+
+def open_state_dict(ckpt_path):
+    """
+    Return (keys, get_tensor) for a checkpoint without reading its tensors.
+
+    Safetensors files are memory mapped, so each tensor is only read when it is requested.
+    Other formats cannot be read lazily and are loaded in full.
+    """
+    if ckpt_path.lower().endswith(".safetensors"):
+        from safetensors import safe_open
+        handle = safe_open(ckpt_path, framework="pt", device="cpu")
+        return list(handle.keys()), handle.get_tensor
+
+    print(f"[Warning] CR Apply Model Merge: {os.path.basename(ckpt_path)} is not a safetensors file and will be loaded in full")
+    sd = comfy.utils.load_torch_file(ckpt_path, safe_load=True)
+    return list(sd.keys()), sd.__getitem__
+
+
+def merged_tensors(ckpt_paths, model_weights, clip_weights):
+    """
+    Yield (key, tensor) for the weighted sum of several checkpoints, one key at a time.
+
+    UNet keys use model_weights and text encoder keys use clip_weights. Only those
+    keys are yielded; every other key is left to the first checkpoint, as is any key
+    that is missing or has another shape in a later checkpoint. Only the tensors of
+    the current key are held in memory.
+    """
+    sources = [open_state_dict(ckpt_path) for ckpt_path in ckpt_paths]
+    key_sets = [set(keys) for keys, _ in sources]
+
+    base_keys, get_base = sources[0]
+
+    for key in base_keys:
+        if key.startswith(merge_model_prefix):
+            weights = model_weights
+        elif key.startswith(merge_clip_prefixes) and not key.endswith((".position_ids", ".logit_scale")):
+            weights = clip_weights
+        else:
+            continue
+
+        base = get_base(key)
+        if not base.is_floating_point():
+            continue
+
+        total = base.to(torch.float32, copy=True).mul_(weights[0])
+        for (_, get_tensor), keys, weight in zip(sources[1:], key_sets[1:], weights[1:]):
+            tensor = get_tensor(key) if key in keys else base
+            if tensor.shape != base.shape:
+                tensor = base
+            total.add_(tensor, alpha=weight)
+            del tensor
+
+        merged = total.to(base.dtype)
+        del base, total
+        yield key, merged
+
+
+def stream_merge_checkpoints(ckpt_paths, model_weights, clip_weights):
+    """
+    Return (MODEL, CLIP) for the weighted sum of several checkpoints.
+
+    The models are built once from the first checkpoint, without a VAE, and the
+    merged UNet tensors are copied into their weights as they are produced, so
+    peak memory stays close to one model. The merged text encoder tensors are
+    collected and loaded into the CLIP together, since their keys are converted
+    per model type.
+    """
+    out = comfy.sd.load_checkpoint_guess_config(ckpt_paths[0], output_vae=False, output_clip=True,
+                                                embedding_directory=folder_paths.get_folder_paths("embeddings"))
+    model, clip = out[0], out[1]
+
+    # Shares storage with the model's parameters
+    unet_weights = model.model.diffusion_model.state_dict()
+    clip_sd = {}
+    skipped = 0
+
+    for key, tensor in merged_tensors(ckpt_paths, model_weights, clip_weights):
+        if key.startswith(merge_model_prefix):
+            target = unet_weights.get(key[len(merge_model_prefix):])
+            if target is None or target.shape != tensor.shape:
+                skipped += 1
+            else:
+                target.copy_(tensor)
+        elif clip is not None:
+            clip_sd[key] = tensor
+        del tensor
+
+    if clip_sd:
+        clip.load_sd(model.model.model_config.process_clip_state_dict(clip_sd), full_model=True)
+    del clip_sd
+
+    if skipped:
+        print(f"[Warning] CR Apply Model Merge: {skipped} UNet weights did not match the model and were taken from the first checkpoint")
+
+    return model, clip
@@ -0,0 +1,84 @@
+#---------------------------------------------------------------------------------------------------------------------#
+# Comfyroll Studio custom nodes by RockOfFire and Akatsuzi    https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes
+# for ComfyUI                                                 https://github.com/comfyanonymous/ComfyUI
+#---------------------------------------------------------------------------------------------------------------------#
+
+import numpy as np
+
+
+def fill_two_colors(mask, color1_rgb, color2_rgb):
+    """
+    Build an RGB uint8 canvas using color1 where mask is True and color2 elsewhere.
+    """
+    palette = np.array([color2_rgb, color1_rgb], dtype=np.uint8)
+    return palette[mask.astype(np.intp)]
+
+
+def color_bars_canvas(width, height, color1_rgb, color2_rgb, orientation, bar_frequency, offset_pixels):
+    """
+    Vectorized equivalent of the per-pixel color bar loops.
+    """
+    i = np.arange(width)[np.newaxis, :]
+    j = np.arange(height)[:, np.newaxis]
+
+    bar_width = width / bar_frequency
+    bar_height = height / bar_frequency
+
+    if orientation == "vertical":
+        bar_number = (i + offset_pixels) // bar_width
+        bar_number = np.broadcast_to(bar_number, (height, width))
+    elif orientation == "horizontal":
+        bar_number = (j + offset_pixels) // bar_height
+        bar_number = np.broadcast_to(bar_number, (height, width))
+    elif orientation == "diagonal":
+        # Calculate the bar width based on a 45 degree angle
+        bar_width = int(bar_height / np.tan(np.pi / 4)) * 2
+        bar_number = (i + j + offset_pixels) // bar_width
+    elif orientation == "alt_diagonal":
+        bar_width = int(bar_height / np.tan(np.pi / 4)) * 2
+        bar_number = (i - j + width + offset_pixels) // bar_width
+    else:
+        return np.zeros((height, width, 3), dtype=np.uint8)
+
+    return fill_two_colors(bar_number % 2 == 0, color1_rgb, color2_rgb)
+
+
+def checker_canvas(width, height, color1_rgb, color2_rgb, mode, grid_frequency, step):
+    """
+    Vectorized equivalent of the per-pixel checker loops.
+    """
+    grid_size = width / grid_frequency
+
+    cell_x = (np.arange(width) // grid_size)[np.newaxis, :]
+    cell_y = (np.arange(height) // grid_size)[:, np.newaxis]
+
+    if mode == "regular":
+        mask = cell_x % 2 == cell_y % 2
+    elif mode == "stepped":
+        mask = cell_x % step != cell_y % step
+    else:
+        return np.zeros((height, width, 3), dtype=np.uint8)
+
+    return fill_two_colors(mask, color1_rgb, color2_rgb)
+
+
+def radial_gradient_canvas(width, height, color1_rgb, color2_rgb, center_x, center_y, max_distance):
+    """
+    Vectorized equivalent of the per-pixel radial gradient loop.
+    """
+    i = np.arange(width)[np.newaxis, :]
+    j = np.arange(height)[:, np.newaxis]
+
+    distance_to_center = np.sqrt((i - center_x) ** 2 + (j - center_y) ** 2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = distance_to_center / max_distance
+
+    # Clamp t to [0, 1] with the same ordering as max(0, min(t, 1)) so NaN maps to 0
+    t = np.where(1 < t, 1.0, t)
+    t = np.where(t > 0, t, 0.0)
+
+    canvas = np.empty((height, width, 3), dtype=np.uint8)
+    for c, (c1, c2) in enumerate(zip(color1_rgb, color2_rgb)):
+        canvas[:, :, c] = c1 * (1 - t) + c2 * t
+    return canvas
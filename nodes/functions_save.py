@@ -0,0 +1,220 @@
+#---------------------------------------------------------------------------------------------------------------------#
+# Comfyroll Studio custom nodes by RockOfFire and Akatsuzi    https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes
+# for ComfyUI                                                 https://github.com/comfyanonymous/ComfyUI
+#---------------------------------------------------------------------------------------------------------------------#
+# Image writer and filename counters for the output nodes
+
+import os
+import re
+import json
+import atexit
+import threading
+import torch
+from concurrent.futures import ThreadPoolExecutor, wait
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+# Encoder threads, PIL releases the GIL while compressing
+max_save_workers = min(8, os.cpu_count() or 1)
+
+# Frames queued or being written at once, a save blocks while the queue is full
+max_pending_saves = 64
+
+# Return from saves as soon as the frames are queued, instead of waiting for them to be written.
+# Previews are always waited for, the UI loads them straight away.
+background_saves = False
+
+image_save_params = {'png': {'format': 'PNG', 'compress_level': 4},
+                     'webp': {'format': 'WEBP', 'method': 6, 'lossless': False, 'quality': 80},
+                     'jpg': {'format': 'JPEG'},
+                     'tif': {'format': 'TIFF'},
+                    }
+
+save_executor = ThreadPoolExecutor(max_workers=max_save_workers, thread_name_prefix="CR image writer")
+
+save_slots = threading.BoundedSemaphore(max_pending_saves)
+
+# Future -> output path, for the writes that have not finished
+pending_saves = {}
+
+save_lock = threading.Lock()
+
+# (folder, prefix, scan) -> next counter, so each folder is only listed on its first save
+next_counters = {}
+
+counter_lock = threading.Lock()
+
+counter_pattern = re.compile(r'\d+')
+
+
+def build_metadata(prompt=None, extra_pnginfo=None):
+    # Serialized once per batch and shared by every frame
+    metadata = PngInfo()
+    if prompt is not None:
+        metadata.add_text("prompt", json.dumps(prompt))
+    if extra_pnginfo is not None:
+        for x in extra_pnginfo:
+            metadata.add_text(x, json.dumps(extra_pnginfo[x]))
+    return metadata
+
+
+def temp_path_for(path):
+    # Hidden file an image is written to before it is renamed into place
+    folder, name = os.path.split(path)
+    return os.path.join(folder, f".{name}.tmp")
+
+
+def move_into_place(temp_path, path):
+    """
+    Rename temp_path to path without replacing a file that took the name in the meantime.
+
+    Reserved names are only known to this process, so another writer (ComfyUI's own
+    SaveImage, another tool) can still create the same file. The name is then taken
+    with a hard link, which fails instead of overwriting, and the image goes to the
+    next free "_1", "_2", ... name. Returns the path written.
+    """
+    stem, ext = os.path.splitext(path)
+    candidate = path
+    suffix = 1
+    while True:
+        try:
+            os.link(temp_path, candidate)
+        except FileExistsError:
+            pass
+        except OSError:
+            # No hard links on this file system, fall back to a checked rename
+            if not os.path.exists(candidate):
+                os.replace(temp_path, candidate)
+                return candidate
+        else:
+            os.remove(temp_path)
+            return candidate
+        candidate = f"{stem}_{suffix}{ext}"
+        suffix += 1
+
+
+def write_image(array, path, file_format, metadata=None):
+    """
+    Write an 8-bit image array, returning the path written.
+
+    The image goes to a hidden temporary file first, so a partly written image is never
+    seen under its final name. For reserved names this is the placeholder left by
+    reserve_filenames.
+    """
+    temp_path = temp_path_for(path)
+    try:
+        Image.fromarray(array).save(temp_path, **image_save_params[file_format], pnginfo=metadata)
+        written = move_into_place(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if written != path:
+        print(f"[Warning] CR Image Writer: {os.path.basename(path)} was created by another writer, saved as {os.path.basename(written)}")
+    return written
+
+
+def finish_save(future):
+    with save_lock:
+        path = pending_saves.pop(future, None)
+    save_slots.release()
+    if future.exception() is not None:
+        print(f"[Warning] CR Image Output: Failed to write {path}: {future.exception()}")
+
+
+def save_image_batch(images, paths, file_format, metadata=None, wait_for_writes=True):
+    """
+    Encode and write an IMAGE batch, one file per frame, on the writer thread pool.
+
+    The frames are converted to 8-bit on the calling thread, so the batch can be freed
+    as soon as this returns. With wait_for_writes off it returns once the frames are
+    queued; the writes finish in the background and flush_saves waits for them.
+    Returns the paths written, or the requested paths when not waiting.
+    """
+    arrays = images.cpu().mul(255.0).clamp_(0, 255).to(torch.uint8).numpy()
+
+    futures = []
+    for array, path in zip(arrays, paths):
+        save_slots.acquire()
+        with save_lock:
+            future = save_executor.submit(write_image, array, path, file_format, metadata)
+            pending_saves[future] = path
+        future.add_done_callback(finish_save)
+        futures.append(future)
+
+    if wait_for_writes:
+        return [future.result() for future in futures]
+    return list(paths)
+
+
+def flush_saves(folder=None):
+    """
+    Wait for the queued writes to finish, only those into folder if one is given.
+    """
+    with save_lock:
+        futures = [future for future, path in pending_saves.items()
+                   if folder is None or os.path.normpath(os.path.dirname(path)) == os.path.normpath(folder)]
+    wait(futures)
+
+
+atexit.register(flush_saves)
+
+
+def image_output_counter(names, filename):
+    # Highest counter of the "<filename>_<counter>_.<ext>" files written by CR Image Output, 0 if there are none
+    highest = 0
+    for name in names:
+        if name[:len(filename)] == filename and name[len(filename):len(filename) + 1] == "_":
+            try:
+                highest = max(highest, int(name[len(filename) + 1:].split('_')[0]))
+            except ValueError:
+                pass
+    return highest
+
+
+def numbered_counter(names, prefix):
+    # Highest number following prefix in a file name, -1 if there are none
+    highest = -1
+    for name in names:
+        if name.startswith(prefix):
+            match = counter_pattern.search(name, len(prefix))
+            if match is not None:
+                highest = max(highest, int(match.group()))
+    return highest
+
+
+def reserve_filenames(folder, prefix, count, make_name, scan):
+    """
+    Reserve count unused file names in folder, numbered on from the highest counter in use.
+
+    scan(names, prefix) returns the highest counter in use. The folder is only listed
+    the first time a (folder, prefix, scan) is seen; later counters come from memory.
+    Each name is claimed by creating its hidden temporary file with O_EXCL, so a name
+    another process took since the scan is skipped instead of overwritten. Nothing
+    appears under the final name until write_image renames the finished image into place.
+    """
+    key = (os.path.realpath(folder), prefix, scan)
+    names = []
+
+    with counter_lock:
+        counter = next_counters.get(key)
+        if counter is None:
+            with os.scandir(folder) as entries:
+                counter = scan([entry.name for entry in entries], prefix) + 1
+
+        while len(names) < count:
+            name = make_name(counter)
+            counter += 1
+            path = os.path.join(folder, name)
+            try:
+                os.close(os.open(temp_path_for(path), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            except FileExistsError:
+                continue
+            if os.path.exists(path):
+                os.remove(temp_path_for(path))
+                continue
+            names.append(name)
+
+        next_counters[key] = counter
+
+    return names
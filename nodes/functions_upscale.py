@@ -8,57 +8,222 @@
 #---------------------------------------------------------------------------------------------------------------------#
 # These functions are based on WAS nodes Image Resize and the Comfy Extras upscale with model nodes
 
+import os
+import time
 import torch
-#import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from spandrel import ModelLoader, ImageModelDescriptor
 from comfy import model_management
 import numpy as np
 import comfy.utils
 import folder_paths
 from PIL import Image
+from .functions_conversion import tensor2pil, pil2tensor, tensor_batch_to_pil_list, pil_list_to_tensor_batch
 
-# PIL to Tensor
-def pil2tensor(image):
-    return torch.from_numpy(np.array(image).astype(np.float32) / 255.0).unsqueeze(0)
+# Upscale models kept loaded between queue items, keyed by path and mtime
+max_cached_upscale_models = 4
 
-# Tensor to PIL
-def tensor2pil(image):
-    return Image.fromarray(np.clip(255. * image.cpu().numpy().squeeze(), 0, 255).astype(np.uint8))
+# Leave the most recently used models on the torch device after upscaling instead of moving them back to the CPU
+keep_upscale_models_on_device = False
+max_device_upscale_models = 1
+
+upscale_models = OrderedDict()
+
+upscale_stats = {"loads": 0, "hits": 0, "load_time": 0.0, "transfers": 0, "transfer_time": 0.0}
+
+# Working tile plan per (model, input size, device), so later runs skip the OOM retries
+upscale_tile_plans = {}
+
+# Estimated working memory of a model per input pixel and channel, relative to the scale.
+# This is the estimate used by the ComfyUI upscale model node.
+upscale_memory_factor = 384.0
+
+# Share of the free memory the planner fills, the rest is headroom for the estimate
+upscale_memory_fraction = 0.8
+
+min_upscale_tile = 128
+max_upscale_tile = {"cpu": 2048, "default": 1024}
+upscale_tile_overlap = 32
+
+# Threads running sub-batches on CPU-only hosts, each one still uses torch's intra-op threads
+max_cpu_upscale_workers = max(1, min(4, (os.cpu_count() or 1) // 4))
 
 def load_model(model_name):
     model_path = folder_paths.get_full_path("upscale_models", model_name)
+    key = (os.path.realpath(model_path), os.path.getmtime(model_path))
+
+    out = upscale_models.get(key)
+    if out is not None:
+        upscale_stats["hits"] += 1
+        upscale_models.move_to_end(key)
+        return out
+
+    start = time.perf_counter()
     sd = comfy.utils.load_torch_file(model_path, safe_load=True)
     if "module.layers.0.residual_group.blocks.0.norm1.weight" in sd:
         sd = comfy.utils.state_dict_prefix_replace(sd, {"module.":""})
     out = ModelLoader().load_from_state_dict(sd).eval()
+    upscale_stats["loads"] += 1
+    upscale_stats["load_time"] += time.perf_counter() - start
+
+    upscale_models[key] = out
+    while len(upscale_models) > max_cached_upscale_models:
+        _, evicted = upscale_models.popitem(last=False)
+        move_model(evicted, "cpu")
+        for plan_key in [plan_key for plan_key in upscale_tile_plans if plan_key[0] == id(evicted)]:
+            del upscale_tile_plans[plan_key]
     return out
+
+def move_model(upscale_model, device):
+    device = torch.device(device)
+    current = upscale_model.device
+    if current.type == device.type and (device.index is None or current.index == device.index):
+        return
+    start = time.perf_counter()
+    upscale_model.to(device)
+    upscale_stats["transfers"] += 1
+    upscale_stats["transfer_time"] += time.perf_counter() - start
+
+def release_model(upscale_model):
+    if not keep_upscale_models_on_device:
+        move_model(upscale_model, "cpu")
+        return
+    # Keep only the most recently used models on the device
+    on_device = [model for model in upscale_models.values() if model.device.type != "cpu"]
+    if upscale_model not in on_device:
+        on_device.append(upscale_model)
+    for model in on_device[:len(on_device) - max_device_upscale_models]:
+        move_model(model, "cpu")
     
+def plan_upscale(upscale_model, in_img, device):
+    """
+    Pick the tile size and the number of frames per model call for a [B,C,H,W] batch.
+
+    The plan is sized from the free memory on the device, the model size and scale,
+    and the input size. When a whole frame fits in one tile the frames are not tiled
+    and several of them go through the model in one call.
+    Returns a dict with tile, overlap, whole, sub_batch, workers and source.
+    """
+    batch, channels, height, width = in_img.shape
+    key = (id(upscale_model), height, width, str(device))
+
+    plan = upscale_tile_plans.get(key)
+    if plan is not None:
+        return dict(plan, source="cached")
+
+    cpu = device.type == "cpu"
+    element_size = in_img.element_size()
+    scale = max(upscale_model.scale, 1)
+
+    # Leave room for the model, the input batch and the upscaled output
+    reserved = model_management.module_size(upscale_model.model)
+    reserved += in_img.nelement() * element_size * (1 + scale * scale)
+    budget = max(model_management.get_free_memory(device) - reserved, 0) * upscale_memory_fraction
+
+    bytes_per_pixel = channels * element_size * scale * upscale_memory_factor
+    max_tile = max_upscale_tile["cpu" if cpu else "default"]
+    tile = int((budget / bytes_per_pixel) ** 0.5) // 64 * 64
+    tile = min(max(tile, min_upscale_tile), max_tile)
+
+    workers = min(max_cpu_upscale_workers, batch) if cpu else 1
+
+    whole = tile >= max(height, width)
+    if whole:
+        # Whole frames, as many per call as the budget allows, shared between the worker threads
+        sub_batch = int(budget // (height * width * bytes_per_pixel)) // workers
+    else:
+        sub_batch = batch
+    if cpu:
+        # Split the batch evenly over the worker threads
+        sub_batch = min(sub_batch, -(-batch // workers))
+    sub_batch = min(max(sub_batch, 1), batch)
+
+    return {"tile": tile, "overlap": upscale_tile_overlap, "whole": whole, "sub_batch": sub_batch, "workers": workers, "source": "planned"}
+
+def run_upscale_plan(upscale_model, in_img, plan, pbar):
+    tile, overlap = plan["tile"], plan["overlap"]
+    chunks = torch.split(in_img, plan["sub_batch"])
+
+    def run(chunk, pbar):
+        # Inference mode is thread-local, so the worker threads have to enter it themselves
+        with torch.inference_mode():
+            if plan["whole"]:
+                # Back to the intermediate device (CPU), where tiled_scale leaves its output too
+                out = upscale_model(chunk).to(model_management.intermediate_device())
+                if pbar is not None:
+                    pbar.update(chunk.shape[0])
+                return out
+            return comfy.utils.tiled_scale(chunk, lambda a: upscale_model(a), tile_x=tile, tile_y=tile, overlap=overlap, upscale_amount=upscale_model.scale, pbar=pbar)
+
+    def steps(chunk):
+        if plan["whole"]:
+            return chunk.shape[0]
+        return chunk.shape[0] * comfy.utils.get_tiled_scale_steps(chunk.shape[3], chunk.shape[2], tile_x=tile, tile_y=tile, overlap=overlap)
+
+    if plan["workers"] > 1 and len(chunks) > 1:
+        # ProgressBar is not thread-safe, so it is only advanced from this thread as chunks finish
+        with ThreadPoolExecutor(max_workers=plan["workers"]) as executor:
+            futures = {executor.submit(run, chunk, None): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                future.result()
+                pbar.update(steps(futures[future]))
+            outs = [future.result() for future in futures]
+    else:
+        outs = [run(chunk, pbar) for chunk in chunks]
+    return torch.cat(outs) if len(outs) > 1 else outs[0]
+
 def upscale_with_model(upscale_model, image):
+    """
+    Upscale an IMAGE batch with a loaded model, following the plan from plan_upscale.
+
+    After an out of memory error the frames per call are halved first, then the tile size,
+    and the plan that worked is kept for the next run at the same size.
+    Returns the upscaled batch and the plan.
+    """
     device = model_management.get_torch_device()
-    upscale_model.to(device)
+    move_model(upscale_model, device)
     in_img = image.movedim(-1,-3).to(device)
-    free_memory = model_management.get_free_memory(device)
 
-    tile = 512
-    overlap = 32
+    plan = plan_upscale(upscale_model, in_img, device)
+    key = (id(upscale_model), in_img.shape[2], in_img.shape[3], str(device))
+    largest = max(in_img.shape[2], in_img.shape[3])
 
     oom = True
     while oom:
         try:
-            steps = in_img.shape[0] * comfy.utils.get_tiled_scale_steps(in_img.shape[3], in_img.shape[2], tile_x=tile, tile_y=tile, overlap=overlap)
+            if plan["whole"]:
+                steps = in_img.shape[0]
+            else:
+                steps = in_img.shape[0] * comfy.utils.get_tiled_scale_steps(in_img.shape[3], in_img.shape[2], tile_x=plan["tile"], tile_y=plan["tile"], overlap=plan["overlap"])
             pbar = comfy.utils.ProgressBar(steps)
-            s = comfy.utils.tiled_scale(in_img, lambda a: upscale_model(a), tile_x=tile, tile_y=tile, overlap=overlap, upscale_amount=upscale_model.scale, pbar=pbar)
+            s = run_upscale_plan(upscale_model, in_img, plan, pbar)
             oom = False
         except model_management.OOM_EXCEPTION as e:
-            tile //= 2
-            if tile < 128:
-                raise e
+            if plan["whole"] and plan["sub_batch"] > 1:
+                plan["sub_batch"] //= 2
+            else:
+                plan["tile"] = min(plan["tile"], largest) // 2
+                plan["whole"] = False
+                if plan["tile"] < min_upscale_tile:
+                    raise e
+            plan["source"] = "retried"
+            print(f"[Warning] CR Upscale: Out of memory, retrying with {describe_plan(plan)}")
 
-    upscale_model.cpu()
+    upscale_tile_plans[key] = {name: value for name, value in plan.items() if name != "source"}
+
+    release_model(upscale_model)
     s = torch.clamp(s.movedim(-3,-1), min=0, max=1.0)
-    return s        
+    return s, plan
 
-def apply_resize_image(image: Image.Image, original_width, original_height, rounding_modulus, mode='scale', supersample='true', factor: int = 2, width: int = 1024, height: int = 1024, resample='bicubic'): 
+def describe_plan(plan):
+    if plan["whole"]:
+        tiling = f"whole frames, {plan['sub_batch']} per call"
+    else:
+        tiling = f"tile {plan['tile']}, overlap {plan['overlap']}, {plan['sub_batch']} frames per chunk"
+    return f"{tiling}, {plan['workers']} threads ({plan['source']})"
+
+def get_resize_size(original_width, original_height, rounding_modulus, mode='scale', factor: int = 2, width: int = 1024):
 
     # Calculate the new width and height based on the given mode and parameters
     if mode == 'rescale':
@@ -71,9 +236,137 @@ def apply_resize_image(image: Image.Image, original_width, original_height, roun
         new_width = width if width % m == 0 else width + (m - width % m)
         new_height = height if height % m == 0 else height + (m - height % m)
 
+    return new_width, new_height
+
+def bicubic_filter(x, a=-0.5):
+    x = np.abs(x)
+    return np.where(x < 1.0, ((a + 2.0) * x - (a + 3.0)) * x * x + 1,
+                    np.where(x < 2.0, (((x - 5) * x + 8) * x - 4) * a, 0.0))
+
+def lanczos_filter(x):
+    return np.where(np.abs(x) < 3.0, np.sinc(x) * np.sinc(x / 3.0), 0.0)
+
+# Filter function and support for each resampling method, as used by PIL
+resample_kernels = {
+    'bilinear': (lambda x: np.maximum(1.0 - np.abs(x), 0.0), 1.0),
+    'bicubic': (bicubic_filter, 2.0),
+    'lanczos': (lanczos_filter, 3.0),
+}
+
+def resample_weights(in_size, out_size, resample):
+    """
+    Per-output source indices and weights for a 1D resize, computed the same way
+    as PIL's precompute_coeffs. Returns (index [out, taps], weight [out, taps]).
+    """
+    scale = in_size / out_size
+
+    if resample == 'nearest':
+        # PIL steps through the source by repeatedly adding the scale, keep its rounding
+        steps = np.full(out_size, scale)
+        steps[0] = scale * 0.5
+        index = np.minimum(np.add.accumulate(steps).astype(np.int64), in_size - 1)
+        return index[:, None], np.ones((out_size, 1))
+
+    kernel, support = resample_kernels[resample]
+    filterscale = max(scale, 1.0)
+    support = support * filterscale
+    taps = int(np.ceil(support)) * 2 + 1
+
+    center = (np.arange(out_size) + 0.5) * scale
+    xmin = np.maximum((center - support + 0.5).astype(np.int64), 0)
+    xmax = np.minimum((center + support + 0.5).astype(np.int64), in_size)
+
+    offsets = np.arange(taps)
+    index = xmin[:, None] + offsets[None, :]
+    weight = kernel((index - center[:, None] + 0.5) / filterscale)
+    weight = np.where(index < xmax[:, None], weight, 0.0)
+
+    total = weight.sum(axis=1, keepdims=True)
+    weight = np.divide(weight, total, out=np.zeros_like(weight), where=total != 0)
+    return np.minimum(index, in_size - 1), weight
+
+def compose_weights(first, second, in_size):
+    """
+    Fold two 1D resizes into one, so an upscale followed by a downscale never builds the large intermediate.
+    """
+    index1, weight1 = first
+    index2, weight2 = second
+
+    # Every source pixel reached by each output pixel, through every intermediate pixel
+    sources = index1[index2].reshape(len(index2), -1)
+    weights = (weight2[:, :, None] * weight1[index2]).reshape(len(index2), -1)
+
+    start = sources.min(axis=1)
+    taps = int((sources.max(axis=1) - start).max()) + 1
+
+    # Sum the contributions of each source pixel into a band starting at the first one
+    combined = np.zeros((len(index2), taps))
+    rows = np.repeat(np.arange(len(index2)), sources.shape[1])
+    np.add.at(combined, (rows, (sources - start[:, None]).ravel()), weights.ravel())
+
+    index = np.minimum(start[:, None] + np.arange(taps)[None, :], in_size - 1)
+    return index, combined
+
+def resample_axis(images, index, weight, dim):
+    # Weighted sum of the source pixels along one axis, one tap at a time
+    index = torch.from_numpy(index).to(images.device)
+    weight = torch.from_numpy(weight).to(images.device, torch.float32)
+
+    shape = [1] * images.ndim
+    shape[dim] = -1
+
+    out = None
+    for tap in range(index.shape[1]):
+        if not torch.any(weight[:, tap]):
+            continue
+        term = images.index_select(dim, index[:, tap]).mul_(weight[:, tap].view(shape))
+        out = term if out is None else out.add_(term)
+    return out
+
+def resize_image_batch(images, new_width, new_height, supersample='true', resample='bicubic'):
+    """
+    Resize an IMAGE batch [B,H,W,C] in one pass with PIL's resampling filters.
+
+    Supersampling used to resize to 8x the target size before scaling down. Both
+    steps are linear, so they are folded into a single set of weights per axis
+    and the 8x intermediate is never built. Memory stays within a few copies of
+    the output batch.
+    """
+    height, width = images.shape[1], images.shape[2]
+
+    def weights(in_size, out_size):
+        if supersample == 'true':
+            up = resample_weights(in_size, out_size * 8, resample)
+            down = resample_weights(out_size * 8, out_size, resample)
+            return compose_weights(up, down, in_size)
+        return resample_weights(in_size, out_size, resample)
+
+    source = images
+    images = images.to(torch.float32)
+
+    # Horizontal pass first, then vertical, as PIL does
+    if new_width != width or supersample == 'true':
+        images = resample_axis(images, *weights(width, new_width), dim=2)
+    if new_height != height or supersample == 'true':
+        images = resample_axis(images, *weights(height, new_height), dim=1)
+
+    # Without a resize this may still be the caller's tensor, which must not be changed
+    if images is source:
+        return images.clamp(0, 1)
+    return images.clamp_(0, 1)
+
+def apply_resize_image(image: Image.Image, original_width, original_height, rounding_modulus, mode='scale', supersample='true', factor: int = 2, width: int = 1024, height: int = 1024, resample='bicubic'): 
+
+    new_width, new_height = get_resize_size(original_width, original_height, rounding_modulus, mode, factor, width)
+
+    # Supersampling RGB images goes through the batch resizer, which does not build the 8x intermediate.
+    # Other modes keep the PIL path, which preserves the mode and resizes RGBA with premultiplied alpha.
+    if supersample == 'true' and image.mode == "RGB":
+        return tensor2pil(resize_image_batch(pil2tensor(image), new_width, new_height, supersample, resample))
+
     # Define a dictionary of resampling filters
     resample_filters = {'nearest': 0, 'bilinear': 2, 'bicubic': 3, 'lanczos': 1}
-    
+
     # Apply supersample
     if supersample == 'true':
         image = image.resize((new_width * 8, new_height * 8), resample=Image.Resampling(resample_filters[resample]))
@@ -82,5 +375,3 @@ def apply_resize_image(image: Image.Image, original_width, original_height, roun
     resized_image = image.resize((new_width, new_height), resample=Image.Resampling(resample_filters[resample]))
     
     return resized_image  
-
-
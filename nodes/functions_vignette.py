@@ -0,0 +1,125 @@
+#---------------------------------------------------------------------------------------------------------------------#
+# Comfyroll Studio custom nodes by RockOfFire and Akatsuzi    https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes
+# for ComfyUI                                                 https://github.com/comfyanonymous/ComfyUI
+#---------------------------------------------------------------------------------------------------------------------#
+# Vignette masks for CR Vignette Filter
+
+import math
+import numpy as np
+import torch
+import torch.nn.functional as F
+from collections import OrderedDict
+from PIL import Image, ImageDraw
+
+# Number of blurred masks kept between runs, keyed by size and vignette settings
+max_cached_masks = 8
+
+vignette_masks = OrderedDict()
+
+
+def box_blur_1d(x, radius):
+    """
+    Box blur along the last dimension of a [N,W] tensor, with a fractional radius
+    whose outermost taps are weighted by the fractional part. Edges are extended.
+    """
+    r = int(radius)
+    a = radius - r
+
+    padded = F.pad(x[None], (r + 1, r + 1), mode="replicate")[0].to(torch.float64)
+    sums = F.pad(torch.cumsum(padded, dim=-1), (1, 0))
+
+    width = x.shape[-1]
+    inner = sums[:, 2 * r + 2:2 * r + 2 + width] - sums[:, 1:1 + width]
+    edges = padded[:, :width] + padded[:, 2 * r + 2:2 * r + 2 + width]
+
+    return ((inner + a * edges) / (2 * r + 1 + 2 * a)).to(x.dtype)
+
+
+def gaussian_blur_2d(mask, sigma, passes=3):
+    """
+    Separable Gaussian blur of a [H,W] float tensor, built from repeated box blurs
+    the same way PIL's GaussianBlur is, so the cost does not grow with sigma.
+    """
+    if sigma <= 0:
+        return mask
+
+    # Box radius giving the requested sigma over the given number of passes
+    sigma2 = sigma * sigma / passes
+    length = math.sqrt(12.0 * sigma2 + 1.0)
+    l = math.floor((length - 1.0) / 2.0)
+    a = (2 * l + 1) * (l * (l + 1) - 3 * sigma2) / (6 * (sigma2 - (l + 1) * (l + 1)))
+    radius = l + a
+
+    out = mask
+    for _ in range(passes):
+        out = box_blur_1d(out, radius)
+    out = out.t()
+    for _ in range(passes):
+        out = box_blur_1d(out, radius)
+    return out.t().contiguous()
+
+
+def draw_vignette_shape(width, height, vignette_shape, reverse, x_offset, y_offset, zoom, feather_amount):
+    """
+    Draw the unblurred vignette shape as an "L" image: 255 where the vignette darkens, 0 inside the shape.
+    """
+    if reverse not in ("no", "yes"):
+        raise ValueError("Invalid value for reverse. Use 'yes' or 'no'.")
+
+    alpha_mask = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(alpha_mask)
+
+    inside = 0 if reverse == 'no' else 255
+    if reverse == 'yes':
+        draw.rectangle([(0, 0), (width, height)], fill=0)
+
+    center_x = width // 2 + x_offset
+    center_y = height // 2 + y_offset
+    radius = min(center_x, center_y) * zoom
+    size_x = (width - feather_amount) * zoom
+    size_y = (height - feather_amount) * zoom
+    size = min(width - x_offset, height - y_offset) * zoom
+
+    if vignette_shape == 'circle':
+        draw.ellipse([(center_x - radius, center_y - radius), (center_x + radius, center_y + radius)], fill=inside)
+    elif vignette_shape == 'oval':
+        draw.ellipse([(center_x - size_x / 2, center_y - size_y / 2),
+                      (center_x + size_x / 2, center_y + size_y / 2)], fill=inside)
+    elif vignette_shape == 'diamond':
+        draw.polygon([(center_x, center_y - size / 2),
+                      (center_x + size / 2, center_y),
+                      (center_x, center_y + size / 2),
+                      (center_x - size / 2, center_y)],
+                     fill=inside)
+    elif vignette_shape == 'square':
+        draw.rectangle([(center_x - size / 2, center_y - size / 2),
+                        (center_x + size / 2, center_y + size / 2)], fill=inside)
+    else:
+        raise ValueError("Invalid vignette_shape. Use 'circle', 'oval', 'square' or 'diamond'.")
+
+    return alpha_mask
+
+
+def get_vignette_mask(width, height, vignette_shape, reverse, x_offset, y_offset, zoom, feather_amount):
+    """
+    Return the feathered vignette mask as a [H,W] float tensor in [0, 1].
+
+    The mask only depends on the image size and the vignette settings, so it is
+    built once and reused for every frame and every later run with the same key.
+    """
+    key = (width, height, vignette_shape, reverse, x_offset, y_offset, zoom, feather_amount)
+
+    mask = vignette_masks.get(key)
+    if mask is not None:
+        vignette_masks.move_to_end(key)
+        return mask
+
+    shape = draw_vignette_shape(width, height, vignette_shape, reverse, x_offset, y_offset, zoom, feather_amount)
+    mask = torch.from_numpy(np.array(shape)).to(torch.float32).div_(255.0)
+    mask = gaussian_blur_2d(mask, feather_amount)
+
+    vignette_masks[key] = mask
+    while len(vignette_masks) > max_cached_masks:
+        vignette_masks.popitem(last=False)
+
+    return mask
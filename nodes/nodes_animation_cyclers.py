@@ -13,14 +13,11 @@ from PIL import Image, ImageEnhance
 import numpy as np
 import io
 from ..categories import icons
+from .functions_conversion import pil2tensor
+from .functions_models import load_lora_file
 
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "comfy"))
 #---------------------------------------------------------------------------------------------------------------------# 
-# FUNCTIONS
-#---------------------------------------------------------------------------------------------------------------------# 
-def pil2tensor(image):
-    return torch.from_numpy(np.array(image).astype(np.float32) / 255.0).unsqueeze(0)
-#---------------------------------------------------------------------------------------------------------------------# 
 # NODES
 #---------------------------------------------------------------------------------------------------------------------# 
 class CR_CycleModels:
@@ -129,7 +126,7 @@ class CR_CycleLoRAs:
             
             # Load the current LoRA
             lora_path = folder_paths.get_full_path("loras", lora_name)
-            lora = comfy.utils.load_torch_file(lora_path, safe_load=True)
+            lora = load_lora_file(lora_path)
             print(f"[Info] CR_CycleLoRAs: Current LoRA is {lora_name}")
 
             # Apply the current LoRA to the model and clip
@@ -19,6 +19,7 @@ from PIL.PngImagePlugin import PngInfo
 from nodes import SaveImage
 import glob
 from ..categories import icons
+from .functions_io import load_frames, list_subfolders, list_directory, load_buffered_frame
 
 #MAX_RESOLUTION=8192
 ALLOWED_EXT = ('.jpeg', '.jpg', '.png', '.tiff', '.gif', '.bmp', '.webp')
@@ -44,6 +45,25 @@ def get_files(image_path, sort_by="Index", pattern=None):
         raise ValueError("Invalid sort_by value. Use 'Index' or 'Alphabetic'.")
 
     return sorted_files
+
+# Sorted frame lists, (folder, sort_by, pattern) -> (folder mtime, files)
+frame_lists = {}
+
+def get_frame_list(image_path, sort_by="Index", pattern=None):
+    # Same as get_files, but the folder is only rescanned and resorted when its mtime changes.
+    # Patterns that reach into subfolders are not cached, the folder mtime does not see changes there.
+    if pattern is not None and any(sep and sep in pattern for sep in ('/', os.sep, os.altsep)):
+        return [name for name in get_files(image_path, sort_by, pattern) if os.path.basename(name) != '.DS_Store']
+
+    mtime = os.stat(image_path).st_mtime_ns
+    key = (image_path, sort_by, pattern)
+
+    cached = frame_lists.get(key)
+    if cached is None or cached[0] != mtime:
+        files = [name for name in get_files(image_path, sort_by, pattern) if os.path.basename(name) != '.DS_Store']
+        cached = (mtime, files)
+        frame_lists[key] = cached
+    return cached[1]
     
 #---------------------------------------------------------------------------------------------------------------------#
 # NODES
@@ -56,9 +76,9 @@ class CR_LoadAnimationFrames:
     def INPUT_TYPES(s):
         #if not os.path.exists(s.input_dir):
             #os.makedirs(s.input_dir)
-        image_folder = [name for name in os.listdir(s.input_dir) if os.path.isdir(os.path.join(s.input_dir,name)) and len(os.listdir(os.path.join(s.input_dir,name))) != 0]
+        image_folder = list_subfolders(s.input_dir, non_empty=True)
         return {"required":
-                    {"image_sequence_folder": (sorted(image_folder), ),
+                    {"image_sequence_folder": (image_folder, ),
                      "start_index": ("INT", {"default": 1, "min": 1, "max": 10000}),
                      "max_frames": ("INT", {"default": 1, "min": 1, "max": 10000})
                      }
@@ -71,19 +91,14 @@ class CR_LoadAnimationFrames:
 
     def load_image_sequence(self, image_sequence_folder, start_index, max_frames):
         image_path = os.path.join(self.input_dir, image_sequence_folder)
-        file_list = sorted(os.listdir(image_path), key=lambda s: sum(((s, int(n)) for s, n in re.findall(r'(\D+)(\d+)', 'a%s0' % s)), ()))
-        sample_frames = []
-        sample_frames_mask = []
+        file_list = list_directory(image_path)
         sample_index = list(range(start_index-1, len(file_list), 1))[:max_frames]
-        for num in sample_index:
-            i = Image.open(os.path.join(image_path, file_list[num]))
-            image = i.convert("RGB")
-            image = np.array(image).astype(np.float32) / 255.0
-            image = torch.from_numpy(image)[None,]
-            image = image.squeeze()
-            sample_frames.append(image)
+        sample_paths = [os.path.join(image_path, file_list[num]) for num in sample_index]
+
+        # Decode the frames in parallel straight into a preallocated batch
+        sample_frames, _ = load_frames(sample_paths, node_name="CR Load Animation Frames")
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/IO-Nodes#cr-load-animation-frames"                        
-        return (torch.stack(sample_frames), show_help, )
+        return (sample_frames, show_help, )
  
 #---------------------------------------------------------------------------------------------------------------------#
 class CR_LoadFlowFrames:
@@ -95,10 +110,10 @@ class CR_LoadFlowFrames:
         #sort_methods = ["Date modified", "Alphabetic", "Index"]
         input_dir = folder_paths.input_directory
 
-        input_folders = [name for name in os.listdir(input_dir) if os.path.isdir(os.path.join(input_dir,name)) and len(os.listdir(os.path.join(input_dir,name))) != 0]
+        input_folders = list_subfolders(input_dir, non_empty=True)
 
         return {"required":
-                    {"input_folder": (sorted(input_folders), ),
+                    {"input_folder": (input_folders, ),
                      "sort_by": (sort_methods, ),
                      "current_frame": ("INT", {"default": 0, "min": 0, "max": 10000, "forceInput": True}),
                      "skip_start_frames": ("INT", {"default": 0, "min": 0, "max": 10000}),
@@ -133,10 +148,8 @@ class CR_LoadFlowFrames:
 
         print(f"[Info] CR Load Flow Frames: ComfyUI Input directory is `{image_path}`")
         
-        file_list = get_files(image_path, sort_by, file_pattern) 
-         
-        if os.path.exists(image_path + '.DS_Store'):
-            file_list.remove('.DS_Store') # For Mac users
+        # Frame list from the index, skipping .DS_Store files left by Macs
+        file_list = get_frame_list(image_path, sort_by, file_pattern)
             
         if len(file_list) == 0:
             print(f"[Warning] CR Load Flow Frames: No matching files found for loading")
@@ -145,24 +158,16 @@ class CR_LoadFlowFrames:
         remaining_files = len(file_list) - current_frame   
         print(f"[Info] CR Load Flow Frames: {remaining_files} input files remaining for processing")
 
-        img = Image.open(os.path.join(image_path, file_list[current_frame]))
-        cur_image = img.convert("RGB")
-        cur_image = np.array(cur_image).astype(np.float32) / 255.0
-        cur_image = torch.from_numpy(cur_image)[None,]
+        # The previous frame is usually still buffered from the last step
+        cur_image = load_buffered_frame(os.path.join(image_path, file_list[current_frame]))
         print(f"[Debug] CR Load Flow Frames: Current image {file_list[current_frame]}")        
 
         # Load first frame as previous frame if no frames skipped
         if current_frame == 0 and skip_start_frames == 0:
-            img = Image.open(os.path.join(image_path, file_list[current_frame]))
-            pre_image = img.convert("RGB")
-            pre_image = np.array(pre_image).astype(np.float32) / 255.0
-            pre_image = torch.from_numpy(pre_image)[None,] 
+            pre_image = cur_image
             print(f"[Debug] CR Load Flow Frames: Previous image {file_list[current_frame]}")               
         else:
-            img = Image.open(os.path.join(image_path, file_list[current_frame - 1]))
-            pre_image = img.convert("RGB")
-            pre_image = np.array(pre_image).astype(np.float32) / 255.0
-            pre_image = torch.from_numpy(pre_image)[None,] 
+            pre_image = load_buffered_frame(os.path.join(image_path, file_list[current_frame - 1]))
             print(f"[Debug] CR Load Flow Frames: Previous image {file_list[current_frame - 1]}")            
 
         return (cur_image, pre_image, current_frame, show_help, )
@@ -178,10 +183,10 @@ class CR_OutputFlowFrames:
     def INPUT_TYPES(cls):
     
         output_dir = folder_paths.output_directory
-        output_folders = [name for name in os.listdir(output_dir) if os.path.isdir(os.path.join(output_dir,name)) and len(os.listdir(os.path.join(output_dir,name))) != 0]
+        output_folders = list_subfolders(output_dir, non_empty=True)
     
         return {
-            "required": {"output_folder": (sorted(output_folders), ),
+            "required": {"output_folder": (output_folders, ),
                          "current_image": ("IMAGE", ),
                          "filename_prefix": ("STRING", {"default": "CR"}),
                          "current_frame": ("INT", {"default": 0, "min": 0, "max": 9999999, "forceInput": True}),
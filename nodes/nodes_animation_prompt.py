@@ -7,7 +7,8 @@ import os
 import folder_paths
 import json
 import torch
-from .functions_json import load_styles_from_directory
+from .functions_json import get_style_index
+from .functions_animation import encode_prompt
 from ..categories import icons
 
 '''
@@ -300,7 +301,7 @@ class CR_LoadPromptStyle:
     def INPUT_TYPES(self):
         style_directory = os.path.join(folder_paths.base_path, "styles")
         #style_directory = os.path.dirname(os.path.realpath(__file__))
-        self.json_data, styles = load_styles_from_directory(style_directory)
+        styles, _ = get_style_index(style_directory)
         file_types = ["json"]
 
         #if not os.path.exists(style_dir):
@@ -320,28 +321,16 @@ class CR_LoadPromptStyle:
 
     def prompt_styler(self, style, file_type):
 
-        for template in self.json_data:
-            if template['name'] == style:
-                template_str = str(template)     
-        print(f"[Info] CR Load Prompt Style: Got style template {template_str}")
-
-        #name, prompt, negative_prompt = extract_values_from_json(template_str)
-        #print(name, prompt, negative_prompt)
-        #split_prompt = prompt.split("{prompt}", 1)
-        #prepend_text = split_prompt[0]
-        #append_text = split_prompt[1]
-        #negative_text = negative_prompt
- 
-        # Note: This will fail if negative_prompt is before the prompt
-        split1 = template_str.split("{prompt}", 1)
-        split2 = split1[0].split("prompt': '", 1)
-        split3 = split1[1].split("', 'negative_prompt", 1)   
-        split4 = split1[1].split("negative_prompt': '", 1)
-        prepend_text = split2[1]
-        append_text = split3[0].replace(" . ","")
-        negative_text = split4[1][:-2]
-      
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Prompt-Nodes#cr-load-prompt-style"
+
+        # Styles are indexed by name with the prompt already split around {prompt}
+        _, styles = get_style_index(os.path.join(folder_paths.base_path, "styles"))
+        if style not in styles:
+            print(f"[Warning] CR Load Prompt Style: Style `{style}` not found")
+            return ("", "", "", show_help, )
+
+        prepend_text, append_text, negative_text = styles[style]
+        print(f"[Info] CR Load Prompt Style: Got style {style}")
         
         return (prepend_text, append_text, negative_text, show_help, )
 
@@ -364,11 +353,9 @@ class CR_EncodeScheduledPrompts:
 
     def condition(self, clip, current_prompt, next_prompt, weight):      
         
-        # CLIP text encoding
-        tokens = clip.tokenize(str(next_prompt))
-        cond_from, pooled_from = clip.encode_from_tokens(tokens, return_pooled=True)
-        tokens = clip.tokenize(str(current_prompt))
-        cond_to, pooled_to = clip.encode_from_tokens(tokens, return_pooled=True)
+        # CLIP text encoding, cached so each prompt is only encoded once between keyframes
+        cond_from, pooled_from = encode_prompt(clip, str(next_prompt))
+        cond_to, pooled_to = encode_prompt(clip, str(current_prompt))
         
         #return (addWeighted([[cond_to, {"pooled_output": pooled_to}]], [[cond_from, {"pooled_output": pooled_from}]], weight),)
         print(weight)
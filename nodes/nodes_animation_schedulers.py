@@ -7,10 +7,17 @@ import comfy.sd
 import os
 import sys
 import folder_paths
-from nodes import LoraLoader
-from .functions_animation import keyframe_scheduler, prompt_scheduler
+from .functions_animation import keyframe_scheduler, prompt_scheduler, get_compiled_schedule
+from .functions_models import load_checkpoint, warm_checkpoint, apply_lora
 from ..categories import icons
 
+def find_model_name(model_list, model_alias):
+    # Return the checkpoint name for an alias, ignoring any duplicate aliases after the first
+    for ckpt_alias, ckpt_name in model_list or []:
+        if ckpt_alias == model_alias:
+            return ckpt_name
+    return ""
+
 #-----------------------------------------------------------------------------------------------------------#
 # NODES
 #-----------------------------------------------------------------------------------------------------------#
@@ -374,9 +381,9 @@ class CR_LoadScheduledModels:
         # Load default Model mode
         if mode == "Load default Model":
             ckpt_path = folder_paths.get_full_path("checkpoints", default_model)
-            out = comfy.sd.load_checkpoint_guess_config(ckpt_path, output_vae=True, output_clip=True, embedding_directory=folder_paths.get_folder_paths("embeddings"))
+            out = load_checkpoint(ckpt_path)
             print(f"[Debug] CR Load Scheduled Models. Loading default model.")    
-            return (out[:3], show_help, )
+            return (*out, show_help, )
         
         # Get params
         params = keyframe_scheduler(schedule, schedule_alias, current_frame)
@@ -385,8 +392,8 @@ class CR_LoadScheduledModels:
         if params == "":
             print(f"[Warning] CR Load Scheduled Models. No model specified in schedule for frame {current_frame}. Using default model.")
             ckpt_path = folder_paths.get_full_path("checkpoints", default_model)
-            out = comfy.sd.load_checkpoint_guess_config(ckpt_path, output_vae=True, output_clip=True, embedding_directory=folder_paths.get_folder_paths("embeddings"))
-            return (out[:3], show_help, )
+            out = load_checkpoint(ckpt_path)
+            return (*out, show_help, )
         else:
             # Try the params
             try:
@@ -396,10 +403,7 @@ class CR_LoadScheduledModels:
                 return()                    
 
         # Iterate through the model list to get the model name
-        for ckpt_alias, ckpt_name in model_list:
-            if ckpt_alias == model_alias:
-                model_name = ckpt_name
-                break  # Exit the loop early once a match is found, ignores any duplicate matches
+        model_name = find_model_name(model_list, model_alias)
                 
         # Check if a matching model has been found        
         if model_name == "":
@@ -408,11 +412,18 @@ class CR_LoadScheduledModels:
         else:
             print(f"[Info] CR Load Scheduled Models. Model alias {model_alias} matched to {model_name}")
         
-        # Load the new model
+        # Load the new model, or reuse it if it is still resident
         ckpt_path = folder_paths.get_full_path("checkpoints", model_name)
-        out = comfy.sd.load_checkpoint_guess_config(ckpt_path, output_vae=True, output_clip=True, embedding_directory=folder_paths.get_folder_paths("embeddings"))
-        print(f"[Info] CR Load Scheduled Models. Loading new checkpoint model {model_name}")
-        return (out[:3], show_help, )
+        out = load_checkpoint(ckpt_path)
+
+        # Start loading the next scheduled model before its keyframe arrives
+        upcoming = get_compiled_schedule(schedule, "keyframe").next_keyframe(schedule_alias, current_frame)
+        if upcoming is not None:
+            next_model_name = find_model_name(model_list, str(upcoming[1]))
+            if next_model_name not in ("", model_name):
+                warm_checkpoint(folder_paths.get_full_path("checkpoints", next_model_name))
+
+        return (*out, show_help, )
  
 #-----------------------------------------------------------------------------------------------------------# 
 class CR_LoadScheduledLoRAs:
@@ -444,7 +455,7 @@ class CR_LoadScheduledLoRAs:
 
     def schedule(self, mode, model, clip, current_frame, schedule_alias, default_lora, strength_model, strength_clip, schedule_format, lora_list=None, schedule=None):
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Scheduler-Nodes#cr-load-scheduled-loras"
-        #lora_name = ""
+        lora_name = ""
 
         # Off mode
         if mode == "Off":
@@ -457,8 +468,8 @@ class CR_LoadScheduledLoRAs:
                 return (model, clip, show_help, )
             if strength_model == 0 and strength_clip == 0:
                 return (model, clip, show_help, )                   
-            model, clip = LoraLoader().load_lora(model, clip, default_lora, strength_model, strength_clip)  
-            print(f"[Info] CR Load Scheduled LoRAs. Loading default LoRA {lora_name}.")    
+            model, clip = apply_lora(model, clip, default_lora, strength_model, strength_clip)  
+            print(f"[Info] CR Load Scheduled LoRAs. Loading default LoRA {default_lora}.")    
             return (model, clip, show_help, )           
         
         # Get params
@@ -468,7 +479,7 @@ class CR_LoadScheduledLoRAs:
         if params == "":
             print(f"[Warning] CR Load Scheduled LoRAs. No LoRA specified in schedule for frame {current_frame}. Using default lora.")
             if default_lora != None:
-                model, clip = LoraLoader().load_lora(model, clip, default_lora, strength_model, strength_clip)
+                model, clip = apply_lora(model, clip, default_lora, strength_model, strength_clip)
             return (model, clip, show_help, )      
         else:
             # Unpack the parameters
@@ -497,7 +508,7 @@ class CR_LoadScheduledLoRAs:
             print(f"[Info] CR Load Scheduled LoRAs. LoRA {lora_name}")
             
         # Load the new LoRA
-        model, clip = LoraLoader().load_lora(model, clip, lora_name, s_strength_model, s_strength_clip)
+        model, clip = apply_lora(model, clip, lora_name, s_strength_model, s_strength_clip)
         print(f"[Debug] CR Load Scheduled LoRAs. Loading new LoRA {lora_name}")
         return (model, clip, show_help, )
  
@@ -20,6 +20,9 @@ from PIL import Image
 from PIL.PngImagePlugin import PngInfo
 from pathlib import Path
 from ..categories import icons
+from . import functions_save
+from .functions_save import build_metadata, save_image_batch, reserve_filenames, image_output_counter
+from .functions_latent import repeat_latent
 
 #---------------------------------------------------------------------------------------------------------------------#
 # Core Nodes
@@ -58,15 +61,6 @@ class CR_ImageOutput:
               
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Core-Nodes#cr-image-output"
     
-        def map_filename(filename):
-            prefix_len = len(os.path.basename(filename_prefix))
-            prefix = filename[:prefix_len + 1]
-            try:
-                digits = int(filename[prefix_len + 1:].split('_')[0])
-            except:
-                digits = 0
-            return (digits, prefix)
-
         if output_type == "Save":
             self.output_dir = folder_paths.get_output_directory()
             self.type = "output"
@@ -97,13 +91,7 @@ class CR_ImageOutput:
         if os.path.commonpath((self.output_dir, os.path.abspath(full_output_folder))) != self.output_dir:
             return {}
 
-        try:
-            counter = max(filter(lambda a: a[1][:-1] == filename and a[1][-1] == "_", map(map_filename, os.listdir(full_output_folder))))[0] + 1
-        except ValueError:
-            counter = 1
-        except FileNotFoundError:
-            os.makedirs(full_output_folder, exist_ok=True)
-            counter = 1
+        os.makedirs(full_output_folder, exist_ok=True)
 
         if output_type == "UI (no batch)":
             # based on ETN_SendImageWebSocket
@@ -123,34 +111,23 @@ class CR_ImageOutput:
                 )
             return {"ui": {"images": results}}
         else:           
+            # Counters come from memory after the first save into this folder
+            file_names = reserve_filenames(full_output_folder, filename, len(images),
+                                           lambda counter: f"{filename}_{counter:05}_.{file_format}", image_output_counter)
+
+            paths = [os.path.join(full_output_folder, file_name) for file_name in file_names]
+
+            # Encode the frames in parallel, with the metadata serialized once for the batch
+            metadata = build_metadata(prompt, extra_pnginfo)
+            paths = save_image_batch(images, paths, file_format, metadata, wait_for_writes=not functions_save.background_saves or self.type == "temp")
+
             results = list()
-            for image in images:
-                i = 255. * image.cpu().numpy()
-                img = Image.fromarray(np.clip(i, 0, 255).astype(np.uint8))
-                metadata = PngInfo()
-                if prompt is not None:
-                    metadata.add_text("prompt", json.dumps(prompt))
-                if extra_pnginfo is not None:
-                    for x in extra_pnginfo:
-                        metadata.add_text(x, json.dumps(extra_pnginfo[x]))
-
-                file_name = f"{filename}_{counter:05}_.{file_format}"
-                
-                img_params = {'png': {'compress_level': 4}, 
-                              'webp': {'method': 6, 'lossless': False, 'quality': 80},
-                              'jpg': {'format': 'JPEG'},
-                              'tif': {'format': 'TIFF'}
-                             }
-                
-                resolved_image_path = os.path.join(full_output_folder, file_name)
-                
-                img.save(resolved_image_path, **img_params[file_format], pnginfo=metadata)
+            for path in paths:
                 results.append({
-                    "filename": file_name,
+                    "filename": os.path.basename(path),
                     "subfolder": subfolder,
                     "type": self.type
                 })
-                counter += 1
 
             return { "ui": { "images": results }, "result": (trigger, show_help,) }
  
@@ -179,6 +156,10 @@ class CR_LatentBatchSize:
     def INPUT_TYPES(s):
         return {"required": {"latent": ("LATENT", ),
                              "batch_size": ("INT", {"default": 2, "min": 1, "max": 999, "step": 1}),
+                            },
+                "optional": {"batch_mode": (["copy", "view"], ),
+                             "noise_strength": ("FLOAT", {"default": 0.0, "min": 0.0, "max": 10.0, "step": 0.01}),
+                             "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
                             }
                }
 
@@ -186,18 +167,17 @@ class CR_LatentBatchSize:
     FUNCTION = "batchsize"
     CATEGORY = icons.get("Comfyroll/Essential/Core")
 
-    def batchsize(self, latent: tg.Sequence[tg.Mapping[tg.Text, torch.Tensor]], batch_size: int):
+    def batchsize(self, latent: tg.Sequence[tg.Mapping[tg.Text, torch.Tensor]], batch_size: int,
+                  batch_mode: str = "copy", noise_strength: float = 0.0, seed: int = 0):
         samples = latent['samples']
-        shape = samples.shape
 
-        sample_list = [samples] + [
-            torch.clone(samples) for _ in range(batch_size - 1)
-        ]
+        # "view" shares the input latent's memory, for graphs where the batch is only read
+        samples = repeat_latent(samples, batch_size, batch_mode, noise_strength, seed)
 
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Core-Nodes#cr-latent-batch-size"
 
         return ({
-            'samples': torch.cat(sample_list),
+            'samples': samples,
         }, )
 
 #---------------------------------------------------------------------------------------------------------------------#
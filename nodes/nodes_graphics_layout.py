@@ -363,8 +363,7 @@ class CR_ImageBorder:
 
         border_color = get_color_values(border_color, border_color_hex, color_mapping)
 
-        for img in image:
-            img = tensor2pil(img)
+        for img in tensor_batch_to_pil_list(image):
             
             # Apply the outline
             if outline_thickness > 0:
@@ -374,9 +373,9 @@ class CR_ImageBorder:
             if left_thickness > 0 or right_thickness > 0 or top_thickness > 0 or bottom_thickness > 0:
                 img = ImageOps.expand(img, (left_thickness, top_thickness, right_thickness, bottom_thickness), fill=border_color)
                 
-            images.append(pil2tensor(img))
+            images.append(img)
         
-        images = torch.cat(images, dim=0)                
+        images = pil_list_to_tensor_batch(images)                
 
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Layout-Nodes#cr-image-border"
 
@@ -573,8 +572,7 @@ class CR_FeatheredBorder:
 
         border_color = get_color_values(border_color, border_color_hex, color_mapping)
 
-        for img in image:
-            im = tensor2pil(img)
+        for im in tensor_batch_to_pil_list(image):
             
             RADIUS = feather_amount
                          
@@ -604,9 +602,9 @@ class CR_FeatheredBorder:
             else:
                 img = back
 
-            images.append(pil2tensor(img))
+            images.append(img)
         
-        images = torch.cat(images, dim=0)                
+        images = pil_list_to_tensor_batch(images)                
 
         return (images, show_help, )
 
@@ -7,19 +7,14 @@ import torch
 import numpy as np
 import os
 import sys
-import io
 import folder_paths
 from PIL import Image
 from ..categories import icons
+from .functions_pattern import color_bars_canvas, checker_canvas, radial_gradient_canvas
 
-try:
-    import matplotlib.pyplot as plt
-except ImportError:
-    import pip
-    pip.main(['install', 'matplotlib'])
-    import matplotlib.pyplot as plt
-    
-from matplotlib.patches import RegularPolygon
+from ..config import STYLES
+from .functions_matplot import matplot_figure, figure2tensor
+from .functions_colormap import apply_style
 
 #---------------------------------------------------------------------------------------------------------------------#
 
@@ -65,15 +60,6 @@ COLORS = ["custom", "white", "black", "red", "green", "blue", "yellow",
           "lightgray", "darkgray", "olive", "lime", "teal", "navy", "maroon",
           "fuchsia", "aqua", "silver", "gold", "turquoise", "lavender",
           "violet", "coral", "indigo"]
-
-STYLES = ["Accent","afmhot","autumn","binary","Blues","bone","BrBG","brg",
-    "BuGn","BuPu","bwr","cividis","CMRmap","cool","coolwarm","copper","cubehelix","Dark2","flag",
-    "gist_earth","gist_gray","gist_heat","gist_rainbow","gist_stern","gist_yarg","GnBu","gnuplot","gnuplot2","gray","Greens",
-    "Greys","hot","hsv","inferno","jet","magma","nipy_spectral","ocean","Oranges","OrRd",
-    "Paired","Pastel1","Pastel2","pink","PiYG","plasma","PRGn","prism","PuBu","PuBuGn",
-    "PuOr","PuRd","Purples","rainbow","RdBu","RdGy","RdPu","RdYlBu","RdYlGn","Reds","seismic",
-    "Set1","Set2","Set3","Spectral","spring","summer","tab10","tab20","tab20b","tab20c","terrain",
-    "turbo","twilight","twilight_shifted","viridis","winter","Wistia","YlGn","YlGnBu","YlOrBr","YlOrRd"]
             
 #---------------------------------------------------------------------------------------------------------------------#
 
@@ -88,12 +74,6 @@ def hex_to_rgb(hex_color):
     b = int(hex_color[4:6], 16)
     return (r, g, b)    
 
-def tensor2pil(image):
-    return Image.fromarray(np.clip(255. * image.cpu().numpy().squeeze(), 0, 255).astype(np.uint8))
-
-def pil2tensor(image):
-    return torch.from_numpy(np.array(image).astype(np.float32) / 255.0).unsqueeze(0)
-
 #---------------------------------------------------------------------------------------------------------------------#
 class CR_HalftoneGrid:
     @classmethod
@@ -132,27 +112,23 @@ class CR_HalftoneGrid:
         if reverse_dot_style == "Yes":
             reverse = "_r"
         
-        fig, ax = plt.subplots(figsize=(width/100,height/100))
+        with matplot_figure(width, height) as (fig, ax):
            
-        dotsx = np.linspace(0, 1, dot_frequency)
-        dotsy = np.linspace(0, 1, dot_frequency)
+            dotsx = np.linspace(0, 1, dot_frequency)
+            dotsy = np.linspace(0, 1, dot_frequency)
     
-        X, Y = np.meshgrid(dotsx, dotsy)
+            X, Y = np.meshgrid(dotsx, dotsy)
     
-        dist = np.sqrt((X - x_pos)**2 + (Y - y_pos)**2)
+            dist = np.sqrt((X - x_pos)**2 + (Y - y_pos)**2)
     
-        fig.patch.set_facecolor(bgc)
-        ax.scatter(X, Y, c=dist, cmap=dot_style+reverse)
+            fig.patch.set_facecolor(bgc)
+            ax.scatter(X, Y, c=dist, cmap=dot_style+reverse)
         
-        plt.axis('off')
-        plt.tight_layout(pad=0, w_pad=0, h_pad=0)
-        plt.autoscale(tight=True)
+            ax.axis('off')
+            fig.tight_layout(pad=0, w_pad=0, h_pad=0)
+            ax.autoscale(tight=True)
             
-        img_buf = io.BytesIO()
-        plt.savefig(img_buf, format='png')
-        img = Image.open(img_buf)
-
-        image_out = pil2tensor(img.convert("RGB"))
+            image_out = figure2tensor(fig)
         
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Pattern-Nodes#cr-halftone-grid"
         
@@ -201,61 +177,20 @@ class CR_ColorBars:
         else:
             color2_rgb = color_mapping.get(color_2, (0, 0, 0))  # Default to black if the color is not found
 
-        canvas = np.zeros((height, width, 3), dtype=np.uint8)
-        
-        bar_width = width / bar_frequency
-        bar_height = height / bar_frequency
         offset_pixels = int(offset * max(width, height))
 
-        if orientation == "vertical":
-            for j in range(height):
-                for i in range(width):
-                    if ((i + offset_pixels) // bar_width) % 2 == 0:  # Check for even index
-                        canvas[j, i] = color1_rgb
-                    else:
-                        canvas[j, i] = color2_rgb
-        elif orientation == "horizontal":
-            for j in range(height):
-                for i in range(width):
-                    if ((j + offset_pixels) // bar_height) % 2 == 0:  # Check for even index
-                        canvas[j, i] = color1_rgb
-                    else:
-                        canvas[j, i] = color2_rgb                
-        elif orientation == "diagonal":
-            # Calculate the bar width based on a 45 degree angle 
-            bar_width = int(bar_height / np.tan(np.pi / 4)) * 2
-            for j in range(height): 
-                for i in range(width):
-                     # Calculate which diagonal bar the pixel belongs to with the offset
-                    bar_number = (i + j + offset_pixels) // bar_width
-                    if bar_number % 2 == 0:  # Check for even bar number
-                        canvas[j, i] = color1_rgb
-                    else:
-                        canvas[j, i] = color2_rgb
-        elif orientation == "alt_diagonal":
-            bar_width = int(bar_height / np.tan(np.pi / 4)) * 2
-            for j in range(height): 
-                for i in range(width):
-                    # Calculate which diagonal bar the pixel belongs to with the offset
-                    bar_number = (i - j + width + offset_pixels) // bar_width
-                    if bar_number % 2 == 0:  # Check for even bar number
-                        canvas[j, i] = color1_rgb
-                    else:
-                        canvas[j, i] = color2_rgb
+        canvas = color_bars_canvas(width, height, color1_rgb, color2_rgb,
+                                   orientation, bar_frequency, offset_pixels)
                 
-        fig, ax = plt.subplots(figsize=(width/100, height/100))
+        with matplot_figure(width, height) as (fig, ax):
 
-        ax.imshow(canvas)
+            ax.imshow(canvas)
 
-        plt.axis('off')
-        plt.tight_layout(pad=0, w_pad=0, h_pad=0)
-        plt.autoscale(tight=True)
+            ax.axis('off')
+            fig.tight_layout(pad=0, w_pad=0, h_pad=0)
+            ax.autoscale(tight=True)
 
-        img_buf = io.BytesIO()
-        plt.savefig(img_buf, format='png')
-        img = Image.open(img_buf)
-        
-        image_out = pil2tensor(img.convert("RGB"))
+            image_out = figure2tensor(fig)
 
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Pattern-Nodes#cr-color-bars"
 
@@ -285,47 +220,29 @@ class CR_StyleBars:
 
     def draw(self, mode, width, height, bar_style, orientation, bar_frequency):
            
-        # Create a horizontal or vertical bar depending on the orientation
+        # The bars only vary along one axis, so build a single profile and broadcast it
         if orientation == "vertical":
-            x = np.linspace(0, 1, width)
-            y = np.zeros((height, width))
+            profile = np.linspace(0, 1, width)
         elif orientation == "horizontal":
-            x = np.zeros((height, width))
-            y = np.linspace(0, 1, height)
-
-        # Create a grid of colors for the bar
-        X, Y = np.meshgrid(x, y)
+            profile = np.linspace(0, 1, height)
 
         if mode == "color bars":
             bar_width = 1 / bar_frequency
-            if orientation == "vertical":
-                colors = (X // bar_width) % 2
-            elif orientation == "horizontal":
-                colors = (Y // bar_width) % 2 
+            colors = (profile // bar_width) % 2
         elif mode == "sin wave":    
-            if orientation == "vertical":
-                colors = np.sin(2 * np.pi * bar_frequency * X)
-            elif orientation == "horizontal":
-                colors = np.sin(2 * np.pi * bar_frequency * Y) 
+            colors = np.sin(2 * np.pi * bar_frequency * profile)
         elif mode == "gradient bars":
-            if orientation == "vertical":
-                colors = (X * bar_frequency * 2) % 2
-            elif orientation == "horizontal":
-                colors = (Y * bar_frequency * 2) % 2
-            
-        fig, ax = plt.subplots(figsize=(width/100, height/100))
+            colors = (profile * bar_frequency * 2) % 2
 
-        ax.imshow(colors, cmap=bar_style, aspect='auto')
+        # Map through the colormap lookup table instead of rendering with matplotlib
+        rgb = apply_style(colors, bar_style)
 
-        plt.axis('off')
-        plt.tight_layout(pad=0, w_pad=0, h_pad=0)
-        plt.autoscale(tight=True)
+        if orientation == "vertical":
+            canvas = np.broadcast_to(rgb[np.newaxis, :, :], (height, width, 3))
+        elif orientation == "horizontal":
+            canvas = np.broadcast_to(rgb[:, np.newaxis, :], (height, width, 3))
 
-        img_buf = io.BytesIO()
-        plt.savefig(img_buf, format='png')
-        img = Image.open(img_buf)
-        
-        image_out = pil2tensor(img.convert("RGB"))        
+        image_out = torch.from_numpy(canvas.astype(np.float32) / 255.0).unsqueeze(0)
 
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Pattern-Nodes#cr-style-bars"
 
@@ -411,18 +328,14 @@ class CR_ColorGradient:
                 interpolated_color = [int(c1 * (1 - t) + c2 * t) for c1, c2 in zip(color1_rgb, color2_rgb)]
                 canvas[j, :] = interpolated_color
                     
-        fig, ax = plt.subplots(figsize=(width / 100, height / 100))
+        with matplot_figure(width, height) as (fig, ax):
 
-        ax.imshow(canvas)
-        plt.axis('off')
-        plt.tight_layout(pad=0, w_pad=0, h_pad=0)
-        plt.autoscale(tight=True)
+            ax.imshow(canvas)
+            ax.axis('off')
+            fig.tight_layout(pad=0, w_pad=0, h_pad=0)
+            ax.autoscale(tight=True)
 
-        img_buf = io.BytesIO()
-        plt.savefig(img_buf, format='png')
-        img = Image.open(img_buf)
-        
-        image_out = pil2tensor(img.convert("RGB"))         
+            image_out = figure2tensor(fig)
 
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Pattern-Nodes#cr-color-gradient"
 
@@ -468,35 +381,22 @@ class CR_RadialGradient:
         else:
             color2_rgb = color_mapping.get(end_color, (0, 0, 0))  # Default to black if the color is not found
  
-        # Create a blank canvas
-        canvas = np.zeros((height, width, 3), dtype=np.uint8)
-
         center_x = int(radial_center_x * width)
         center_y = int(radial_center_y * height)                
         # Computation for max_distance
         max_distance = (np.sqrt(max(center_x, width - center_x)**2 + max(center_y, height - center_y)**2))*gradient_distance
 
-        for i in range(width):
-            for j in range(height):
-                distance_to_center = np.sqrt((i - center_x) ** 2 + (j - center_y) ** 2)
-                t = distance_to_center / max_distance
-                # Ensure t is between 0 and 1
-                t = max(0, min(t, 1))
-                interpolated_color = [int(c1 * (1 - t) + c2 * t) for c1, c2 in zip(color1_rgb, color2_rgb)]
-                canvas[j, i] = interpolated_color 
+        canvas = radial_gradient_canvas(width, height, color1_rgb, color2_rgb,
+                                        center_x, center_y, max_distance)
 
-        fig, ax = plt.subplots(figsize=(width / 100, height / 100))
+        with matplot_figure(width, height) as (fig, ax):
 
-        ax.imshow(canvas)
-        plt.axis('off')
-        plt.tight_layout(pad=0, w_pad=0, h_pad=0)
-        plt.autoscale(tight=True)
+            ax.imshow(canvas)
+            ax.axis('off')
+            fig.tight_layout(pad=0, w_pad=0, h_pad=0)
+            ax.autoscale(tight=True)
 
-        img_buf = io.BytesIO()
-        plt.savefig(img_buf, format='png')
-        img = Image.open(img_buf)
-
-        image_out = pil2tensor(img.convert("RGB"))
+            image_out = figure2tensor(fig)
 
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Pattern-Nodes#cr-radial-gradiant"
 
@@ -545,38 +445,18 @@ class CR_CheckerPattern:
         else:
             color2_rgb = color_mapping.get(color_2, (0, 0, 0))  # Default to black if the color is not found
 
-        # Create a blank canvas
-        canvas = np.zeros((height, width, 3), dtype=np.uint8)
-        
-        grid_size = width / grid_frequency
-
-        for i in range(width):
-            for j in range(height):
-            
-                if mode == "regular":
-                    if (i // grid_size) % 2 == (j // grid_size) % 2:    
-                        canvas[j, i] = color1_rgb
-                    else:
-                        canvas[j, i] = color2_rgb
-                elif mode == "stepped":
-                    if (i // grid_size) % step != (j // grid_size) % step:    
-                        canvas[j, i] = color1_rgb            
-                    else:
-                        canvas[j, i] = color2_rgb  
-
-        fig, ax = plt.subplots(figsize=(width/100, height/100))
+        canvas = checker_canvas(width, height, color1_rgb, color2_rgb,
+                                mode, grid_frequency, step)
 
-        ax.imshow(canvas)
+        with matplot_figure(width, height) as (fig, ax):
 
-        plt.axis('off')
-        plt.tight_layout(pad=0, w_pad=0, h_pad=0)
-        plt.autoscale(tight=True)
+            ax.imshow(canvas)
 
-        img_buf = io.BytesIO()
-        plt.savefig(img_buf, format='png')
-        img = Image.open(img_buf)
+            ax.axis('off')
+            fig.tight_layout(pad=0, w_pad=0, h_pad=0)
+            ax.autoscale(tight=True)
 
-        image_out = pil2tensor(img.convert("RGB"))         
+            image_out = figure2tensor(fig)
 
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Pattern-Nodes#cr-checker-pattern"
 
@@ -617,6 +497,8 @@ class CR_Polygons:
              face_color, background_color, line_color, line_width,
              face_color_hex='#000000', bg_color_hex='#000000', line_color_hex='#000000'):
 
+        from matplotlib.patches import RegularPolygon
+
         # Get RGB values 
         if face_color == "custom":
             face_color = face_color_hex
@@ -627,43 +509,39 @@ class CR_Polygons:
         if background_color == "custom":
             background_color = bg_color_hex
     
-        fig, ax = plt.subplots(figsize=(width/100, height/100))
-        fig.set_facecolor(background_color)
-        plt.xlim(0, width/100)
-        plt.ylim(0, height/100)
-        plt.axis('off')
-        plt.tight_layout(pad=0, w_pad=0, h_pad=0)
-        plt.autoscale(False)         
-
-        # Get polygon shape  
-        if mode == "hexagons":
-            vertices = 6
-        elif mode == "triangles":
-            vertices = 3      
+        with matplot_figure(width, height) as (fig, ax):
+            fig.set_facecolor(background_color)
+            ax.set_xlim(0, width/100)
+            ax.set_ylim(0, height/100)
+            ax.axis('off')
+            fig.tight_layout(pad=0, w_pad=0, h_pad=0)
+            ax.autoscale(False)         
+
+            # Get polygon shape  
+            if mode == "hexagons":
+                vertices = 6
+            elif mode == "triangles":
+                vertices = 3      
         
-        # Define the height and width of a hexagon
-        cell_width = (width/100) / columns
+            # Define the height and width of a hexagon
+            cell_width = (width/100) / columns
     
-        cell_height = (width/height) * np.sqrt(3) * (height/100) / (2 * columns)
+            cell_height = (width/height) * np.sqrt(3) * (height/100) / (2 * columns)
         
-        for row in range(rows + 2):
-            for col in range(columns + 2):
-                x = col * cell_width
-                y = row * cell_height
-
-                # Shift every other row
-                if row % 2 == 1:
-                    x += cell_width / 2
+            for row in range(rows + 2):
+                for col in range(columns + 2):
+                    x = col * cell_width
+                    y = row * cell_height
+
+                    # Shift every other row
+                    if row % 2 == 1:
+                        x += cell_width / 2
                     
-                # Create a hexagon as a polygon patch
-                hexagon = RegularPolygon((x, y), numVertices=vertices, radius=cell_width/1.732, edgecolor=line_color, linewidth=line_width, facecolor=face_color)
-                ax.add_patch(hexagon)
+                    # Create a hexagon as a polygon patch
+                    hexagon = RegularPolygon((x, y), numVertices=vertices, radius=cell_width/1.732, edgecolor=line_color, linewidth=line_width, facecolor=face_color)
+                    ax.add_patch(hexagon)
                  
-        img_buf = io.BytesIO()
-        plt.savefig(img_buf, format='png')
-        img = Image.open(img_buf)
-
-        image_out = pil2tensor(img.convert("RGB"))         
+            image_out = figure2tensor(fig)
 
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Pattern-Nodes#cr-polygons"
 
@@ -716,36 +594,32 @@ class CR_StarburstLines:
         angle = 360 / num_lines
 
         # Set up the plot
-        fig, ax = plt.subplots(figsize=(width/100,height/100))
-        plt.xlim(-width/100, width/100)
-        plt.ylim(-height/100, height/100)
-        plt.axis('off')
-        plt.tight_layout(pad=0, w_pad=0, h_pad=0)
-        plt.autoscale(False)        
-
-        # Coordinates of the central point
-        center_x = center_x/100
-        center_y = center_y/100
-
-        # Draw the starburst lines
-        for i in range(num_lines):
-            # Calculate the endpoint of each line
-            x_unrotated = center_x + line_length * np.cos(np.radians(i * angle))
-            y_unrotated = center_y + line_length * np.sin(np.radians(i * angle))
+        with matplot_figure(width, height) as (fig, ax):
+            ax.set_xlim(-width/100, width/100)
+            ax.set_ylim(-height/100, height/100)
+            ax.axis('off')
+            fig.tight_layout(pad=0, w_pad=0, h_pad=0)
+            ax.autoscale(False)        
+
+            # Coordinates of the central point
+            center_x = center_x/100
+            center_y = center_y/100
+
+            # Draw the starburst lines
+            for i in range(num_lines):
+                # Calculate the endpoint of each line
+                x_unrotated = center_x + line_length * np.cos(np.radians(i * angle))
+                y_unrotated = center_y + line_length * np.sin(np.radians(i * angle))
         
-            # Apply rotation transformation
-            x = center_x + x_unrotated * np.cos(np.radians(rotation)) - y_unrotated * np.sin(np.radians(rotation))
-            y = center_y + x_unrotated * np.sin(np.radians(rotation)) + y_unrotated * np.cos(np.radians(rotation))
+                # Apply rotation transformation
+                x = center_x + x_unrotated * np.cos(np.radians(rotation)) - y_unrotated * np.sin(np.radians(rotation))
+                y = center_y + x_unrotated * np.sin(np.radians(rotation)) + y_unrotated * np.cos(np.radians(rotation))
         
-            # Plot the line
-            fig.patch.set_facecolor(bgc)
-            ax.plot([center_x, x], [center_y, y], color=line_color, linewidth=line_width)
+                # Plot the line
+                fig.patch.set_facecolor(bgc)
+                ax.plot([center_x, x], [center_y, y], color=line_color, linewidth=line_width)
    
-        img_buf = io.BytesIO()
-        plt.savefig(img_buf, format='png')
-        img = Image.open(img_buf)
-
-        image_out = pil2tensor(img.convert("RGB"))         
+            image_out = figure2tensor(fig)
 
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Pattern-Nodes#cr-starburst-lines"
 
@@ -794,53 +668,47 @@ class CR_StarburstColors:
         else:
             color_2 = color_2
 
-        # Set up the plot
-        fig, ax = plt.subplots()
-        
         x = width/100
         y = height/100
 
-        fig, ax = plt.subplots(figsize=(x,y))  
-        plt.xlim(-x/2, x/2)
-        plt.ylim(-y/2, y/2)
+        # Set up the plot
+        with matplot_figure(width, height) as (fig, ax):
+            ax.set_xlim(-x/2, x/2)
+            ax.set_ylim(-y/2, y/2)
         
-        plt.axis('off')
-        plt.tight_layout(pad=0, w_pad=0, h_pad=0)
-        plt.autoscale(False)
+            ax.axis('off')
+            fig.tight_layout(pad=0, w_pad=0, h_pad=0)
+            ax.autoscale(False)
         
-        # Set the size of the starburst bounding box in x and y dimensions
-        box_width = bbox_factor * x
-        box_height = bbox_factor * y
+            # Set the size of the starburst bounding box in x and y dimensions
+            box_width = bbox_factor * x
+            box_height = bbox_factor * y
         
-        # Initialize a color list for alternating colors
-        colors = [color_1, color_2]
+            # Initialize a color list for alternating colors
+            colors = [color_1, color_2]
         
-        tri = num_triangles
+            tri = num_triangles
         
-        # Draw the starburst triangles with alternating colors and square pattern
-        for i in range(tri):
-            # Calculate the endpoints of the triangle with varying length
-            x1 = center_x/100
-            y1 = center_y/100
-            x2_unrotated = (box_width / 2) * np.cos(np.radians(i * 360 / tri))
-            y2_unrotated = (box_height / 2) * np.sin(np.radians(i * 360 / tri))
-            x3_unrotated = (box_width / 2) * np.cos(np.radians((i + 1) * 360 / tri))
-            y3_unrotated = (box_height / 2) * np.sin(np.radians((i + 1) * 360 / tri))
+            # Draw the starburst triangles with alternating colors and square pattern
+            for i in range(tri):
+                # Calculate the endpoints of the triangle with varying length
+                x1 = center_x/100
+                y1 = center_y/100
+                x2_unrotated = (box_width / 2) * np.cos(np.radians(i * 360 / tri))
+                y2_unrotated = (box_height / 2) * np.sin(np.radians(i * 360 / tri))
+                x3_unrotated = (box_width / 2) * np.cos(np.radians((i + 1) * 360 / tri))
+                y3_unrotated = (box_height / 2) * np.sin(np.radians((i + 1) * 360 / tri))
             
-            #apply rotation transform
-            x2 = x2_unrotated * np.cos(np.radians(rotation)) - y2_unrotated * np.sin(np.radians(rotation))
-            y2 = x2_unrotated * np.sin(np.radians(rotation)) + y2_unrotated * np.cos(np.radians(rotation))
-            x3 = x3_unrotated * np.cos(np.radians(rotation)) - y3_unrotated * np.sin(np.radians(rotation))
-            y3 = x3_unrotated * np.sin(np.radians(rotation)) + y3_unrotated * np.cos(np.radians(rotation))
+                #apply rotation transform
+                x2 = x2_unrotated * np.cos(np.radians(rotation)) - y2_unrotated * np.sin(np.radians(rotation))
+                y2 = x2_unrotated * np.sin(np.radians(rotation)) + y2_unrotated * np.cos(np.radians(rotation))
+                x3 = x3_unrotated * np.cos(np.radians(rotation)) - y3_unrotated * np.sin(np.radians(rotation))
+                y3 = x3_unrotated * np.sin(np.radians(rotation)) + y3_unrotated * np.cos(np.radians(rotation))
             
-            # Plot the triangle with alternating colors
-            ax.fill([x1, x2, x3, x1], [y1, y2, y3, y1], color=colors[i % 2])
-
-        img_buf = io.BytesIO()
-        plt.savefig(img_buf, format='png')
-        img = Image.open(img_buf)
+                # Plot the triangle with alternating colors
+                ax.fill([x1, x2, x3, x1], [y1, y2, y3, y1], color=colors[i % 2])
 
-        image_out = pil2tensor(img.convert("RGB"))         
+            image_out = figure2tensor(fig)
 
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Pattern-Nodes#cr-starburst-colors"
 
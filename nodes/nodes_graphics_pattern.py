@@ -11,6 +11,7 @@ import math
 from PIL import Image, ImageDraw
 
 from .functions_graphics import get_color_values
+from .functions_conversion import tensor2pil, pil2tensor
 from .shapes import (
     draw_circle, draw_oval, draw_diamond, draw_square,
     draw_triangle, draw_hexagon, draw_octagon,
@@ -19,12 +20,6 @@ from .shapes import (
 from ..categories import icons
 from ..config import color_mapping, COLORS
 
-def tensor2pil(image):
-    return Image.fromarray(np.clip(255. * image.cpu().numpy().squeeze(), 0, 255).astype(np.uint8))
-
-def pil2tensor(image):
-    return torch.from_numpy(np.array(image).astype(np.float32) / 255.0).unsqueeze(0) 
-
 #---------------------------------------------------------------------------------------------------------------------#
 class CR_BinaryPatternSimple:
     
@@ -526,10 +526,9 @@ class CR_ThumbnailPreview:
         result_images = []
         outline_thickness = 1
       
-        for img in image:
-            pil_img = tensor2pil(img)
+        for pil_img in tensor_batch_to_pil_list(image):
             original_width, original_height = pil_img.size        
-            rescaled_img = apply_resize_image(tensor2pil(img), original_width, original_height, 8, "rescale", "false", rescale_factor, 256, "lanczos")
+            rescaled_img = apply_resize_image(pil_img, original_width, original_height, 8, "rescale", "false", rescale_factor, 256, "lanczos")
             outlined_img = ImageOps.expand(rescaled_img, outline_thickness, fill="black")
             result_images.append(outlined_img)
  
@@ -580,7 +579,7 @@ class CR_SeamlessChecker:
       
         pil_img = tensor2pil(image)
         original_width, original_height = pil_img.size        
-        rescaled_img = apply_resize_image(tensor2pil(image), original_width, original_height, 8, "rescale", "false", rescale_factor, 256, "lanczos")
+        rescaled_img = apply_resize_image(pil_img, original_width, original_height, 8, "rescale", "false", rescale_factor, 256, "lanczos")
         outlined_img = ImageOps.expand(rescaled_img, outline_thickness, fill="black")
         
         max_columns = int(grid_options[0])
@@ -404,7 +404,7 @@ class CR_SimpleTextWatermark:
             # Load the font
             font_file = os.path.join("fonts", str(font_name))             
             resolved_font_path = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), font_file)
-            font = ImageFont.truetype(str(resolved_font_path), size=font_size)
+            font = get_font(resolved_font_path, font_size)
             
             # Get the size of the text
             textsize = get_text_size(draw, text, font)
@@ -8,21 +8,16 @@ import numpy as np
 import os
 import sys
 import folder_paths
-import re
 import comfy.sd
 import csv
 import math
 import random
-from PIL import Image, ImageSequence
+from PIL import Image
 from pathlib import Path
 from itertools import product
 from ..categories import icons
-
-def tensor2pil(image):
-    return Image.fromarray(np.clip(255. * image.cpu().numpy().squeeze(), 0, 255).astype(np.uint8))
-
-def pil2tensor(image):
-    return torch.from_numpy(np.array(image).astype(np.float32) / 255.0).unsqueeze(0) 
+from .functions_conversion import tensor2pil, pil2tensor
+from .functions_io import list_directory, list_subfolders, load_image_list, read_animation_frames
 
 def tensor2rgba(t: torch.Tensor) -> torch.Tensor:
     size = t.size()
@@ -139,9 +134,9 @@ class CR_LoadImageList:
     def INPUT_TYPES(s):
     
         input_dir = folder_paths.input_directory
-        image_folder = [name for name in os.listdir(input_dir) if os.path.isdir(os.path.join(input_dir,name))] 
+        image_folder = list_subfolders(input_dir)
     
-        return {"required": {"input_folder": (sorted(image_folder), ),
+        return {"required": {"input_folder": (image_folder, ),
                              "start_index": ("INT", {"default": 0, "min": 0, "max": 9999}),
                              "max_images": ("INT", {"default": 1, "min": 1, "max": 9999}),
                },
@@ -170,32 +165,24 @@ class CR_LoadImageList:
             in_path = os.path.join(input_dir, input_folder)
 
         # Check if the folder is empty
-        if not os.listdir(in_path):
+        file_list = list_directory(in_path)
+        if not file_list:
             print(f"[Warning] CR Image List: The folder `{in_path}` is empty")
             return None
 
-        file_list = sorted(os.listdir(in_path), key=lambda s: sum(((s, int(n)) for s, n in re.findall(r'(\D+)(\d+)', 'a%s0' % s)), ()))
-        
-        image_list = []
-        
         # Ensure start_index is within the bounds of the list
         start_index = max(0, min(start_index, len(file_list) - 1))
 
         # Calculate the end index based on max_rows
         end_index = min(start_index + max_images, len(file_list) - 1)
-                    
-        for num in range(start_index, end_index):
-            img = Image.open(os.path.join(in_path, file_list[num]))
-            image = img.convert("RGB")
-            image_list.append(pil2tensor(image))
+
+        # Decode the images in parallel, one tensor per image
+        images_out, _ = load_image_list([os.path.join(in_path, file_list[num]) for num in range(start_index, end_index)])
         
-        if not image_list:
+        if not images_out:
             # Handle the case where the list is empty
             print("CR Load Image List: No images found.")
             return None
-            
-        images = torch.cat(image_list, dim=0)
-        images_out = [images[i:i + 1, ...] for i in range(images.shape[0])]
 
         return (images_out, show_help, )
 
@@ -206,9 +193,9 @@ class CR_LoadImageListPlus:
     def INPUT_TYPES(s):
     
         input_dir = folder_paths.input_directory
-        image_folder = [name for name in os.listdir(input_dir) if os.path.isdir(os.path.join(input_dir,name))] 
+        image_folder = list_subfolders(input_dir)
     
-        return {"required": {"input_folder": (sorted(image_folder), ),
+        return {"required": {"input_folder": (image_folder, ),
                              "start_index": ("INT", {"default": 0, "min": 0, "max": 99999}),
                              "max_images": ("INT", {"default": 1, "min": 1, "max": 99999}),
                },
@@ -237,56 +224,33 @@ class CR_LoadImageListPlus:
             in_path = os.path.join(input_dir, input_folder)
 
         # Check if the folder is empty
-        if not os.listdir(in_path):
+        file_list = list_directory(in_path)
+        if not file_list:
             print(f"[Warning] CR Image List: The folder `{in_path}` is empty")
             return None
 
-        file_list = sorted(os.listdir(in_path), key=lambda s: sum(((s, int(n)) for s, n in re.findall(r'(\D+)(\d+)', 'a%s0' % s)), ()))
-        
-        image_list = []
-        mask_list = []
-        index_list = []        
-        filename_list = []
-        exif_list = []         
-        
         # Ensure start_index is within the bounds of the list
         start_index = max(0, min(start_index, len(file_list) - 1))
 
         # Calculate the end index based on max_rows
         end_index = min(start_index + max_images, len(file_list) - 1)
-                    
-        for num in range(start_index, end_index):
-            filename = file_list[num]
-            img_path = os.path.join(in_path, filename)
-            
-            img = Image.open(os.path.join(in_path, file_list[num]))            
-            image_list.append(pil2tensor(img.convert("RGB")))
-            
-            tensor_img = pil2tensor(img)
-            mask_list.append(tensor2rgba(tensor_img)[:,:,:,0])
-           
-            # Populate the image index
-            index_list.append(num)
 
-            # Populate the filename_list
-            filename_list.append(filename)
+        index_list = list(range(start_index, end_index))
+        filename_list = [file_list[num] for num in index_list]
+
+        # Decode each image once for both the image and the mask
+        images_out, mask_out = load_image_list([os.path.join(in_path, filename) for filename in filename_list], with_masks=True)
             
-        if not image_list:
+        if not images_out:
             # Handle the case where the list is empty
             print("CR Load Image List: No images found.")
             return None
 
-        width, height = Image.open(os.path.join(in_path, file_list[start_index])).size
-            
-        images = torch.cat(image_list, dim=0)
-        images_out = [images[i:i + 1, ...] for i in range(images.shape[0])]
-
-        masks = torch.cat(mask_list, dim=0)
-        mask_out = [masks[i:i + 1, ...] for i in range(masks.shape[0])]
+        height, width = images_out[0].shape[1:3]
         
         list_length = end_index - start_index
         
-        return (images_out, mask_out, index_list, filename_list, index_list, width, height, list_length, show_help, )
+        return (images_out, mask_out, index_list, filename_list, width, height, list_length, show_help, )
 
 #---------------------------------------------------------------------------------------------------------------------#
 class CR_LoadGIFAsList:
@@ -295,9 +259,9 @@ class CR_LoadGIFAsList:
     def INPUT_TYPES(cls):
     
         input_dir = folder_paths.input_directory
-        image_folder = [name for name in os.listdir(input_dir) if os.path.isdir(os.path.join(input_dir,name))] 
+        image_folder = list_subfolders(input_dir)
     
-        return {"required": {"input_folder": (sorted(image_folder), ),
+        return {"required": {"input_folder": (image_folder, ),
                              "gif_filename": ("STRING", {"multiline": False, "default": "text"}),
                              "start_frame": ("INT", {"default": 0, "min": 0, "max": 99999}),
                              "max_frames": ("INT", {"default": 1, "min": 1, "max": 99999}),                              
@@ -329,35 +293,12 @@ class CR_LoadGIFAsList:
         # Construct the GIF file path
         gif_file_path = os.path.join(in_path, gif_filename) 
   
-        frames_list = []
-        masks_list = []
-         
         try:
-            # Open the GIF file
-            with Image.open(gif_file_path) as gif_image:
-                   
-                for i, frame in enumerate(ImageSequence.Iterator(gif_image)):
-                    if i < start_frame:
-                        continue  # Skip frames until reaching the start_frame
-
-                    if max_frames is not None and i >= start_frame + max_frames:
-                        break  # Stop after max_frames frames
-
-                    # Extract frame
-                    img = frame.copy()
-                    width, height = img.size
-                    frames_list.append(pil2tensor(img.convert("RGB")))
-                        
-                    tensor_img = pil2tensor(img)                   
-                    masks_list.append(tensor2rgba(tensor_img)[:,:,:,0])
-                        
-            # Convert frames to tensor list
-            images = torch.cat(frames_list, dim=0)
-            images_out = [images[i:i + 1, ...] for i in range(images.shape[0])]
-
-            # Convert masks to tensor list
-            masks = torch.cat(masks_list, dim=0)
-            masks_out = [masks[i:i + 1, ...] for i in range(masks.shape[0])]                        
+            # Decode the frame window, carrying on from the last window read from this file
+            images_out, masks_out = read_animation_frames(gif_file_path, start_frame, max_frames, with_masks=True)
+
+            if not images_out:
+                raise ValueError(f"No frames found from frame {start_frame} in `{gif_file_path}`")
 
             return (images_out, masks_out, show_help, )
 
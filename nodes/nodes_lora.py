@@ -11,6 +11,7 @@ import folder_paths
 import hashlib
 from random import random, uniform
 from ..categories import icons
+from .functions_models import load_lora_file
 
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "comfy"))
 
@@ -19,8 +20,6 @@ sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "co
 #---------------------------------------------------------------------------------------------------------------------#
 # This is a load lora node with an added switch to turn on or off.  On will add the lora and off will skip the node.
 class CR_LoraLoader:
-    def __init__(self):
-        self.loaded_lora = None
 
     @classmethod
     def INPUT_TYPES(s):
@@ -49,16 +48,7 @@ class CR_LoraLoader:
             return (model, clip, show_help, )
 
         lora_path = folder_paths.get_full_path("loras", lora_name)
-        lora = None
-        if self.loaded_lora is not None:
-            if self.loaded_lora[0] == lora_path:
-                lora = self.loaded_lora[1]
-            else:
-                del self.loaded_lora
-
-        if lora is None:
-            lora = comfy.utils.load_torch_file(lora_path, safe_load=True)
-            self.loaded_lora = (lora_path, lora)
+        lora = load_lora_file(lora_path)
 
         model_lora, clip_lora = comfy.sd.load_lora_for_models(model, clip, lora, strength_model, strength_clip)
         return (model_lora, clip_lora, show_help, )
@@ -155,7 +145,7 @@ class CR_ApplyLoRAStack:
             lora_name, strength_model, strength_clip = tup
             
             lora_path = folder_paths.get_full_path("loras", lora_name)
-            lora = comfy.utils.load_torch_file(lora_path, safe_load=True)
+            lora = load_lora_file(lora_path)
             
             model_lora, clip_lora = comfy.sd.load_lora_for_models(model_lora, clip_lora, lora, strength_model, strength_clip)  
 
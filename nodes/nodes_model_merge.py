@@ -7,6 +7,7 @@ import comfy.sd
 import comfy.model_management
 import folder_paths
 from ..categories import icons
+from .functions_models import stream_merge_checkpoints
 
 #---------------------------------------------------------------------------------------------------------------------#                        
 # Model Merge Nodes
@@ -70,7 +71,7 @@ class CR_ApplyModelMerge:
     @classmethod
     def INPUT_TYPES(s):
     
-        merge_methods = ["Recursive", "Weighted"]
+        merge_methods = ["Recursive", "Weighted", "Streaming"]
         
         return {"required": {"model_stack": ("MODEL_STACK",),
                              "merge_method": (merge_methods,),
@@ -108,6 +109,10 @@ class CR_ApplyModelMerge:
             model_name, model_ratio, clip_ratio = model_tuple
             sum_model_ratio += model_ratio                
             sum_clip_ratio += clip_ratio
+
+        # Single pass weighted sum, read key by key from the checkpoint files
+        if merge_method == "Streaming":
+            return self.stream_merge(model_stack, sum_model_ratio, sum_clip_ratio)
    
         # Do recursive merge loops
         model_mix_info = model_mix_info + "Ratios are applied using the Recursive method\n\n"
@@ -162,6 +167,39 @@ class CR_ApplyModelMerge:
                 
         return (model1, clip1, model_mix_info, show_help, )
 
+    def stream_merge(self, model_stack, sum_model_ratio, sum_clip_ratio):
+        model_mix_info = "Merge Info:\nRatios are applied as a single weighted sum using the Streaming method\n\n"
+
+        # A weighted sum whose weights do not add up to 1 scales every weight of the model,
+        # so the Streaming method always normalises the ratios
+        if sum_model_ratio == 0 or sum_clip_ratio == 0:
+            print(f"[Warning] Apply Model Merge: Sum of model ratios is 0. Ratios cannot be normalised")
+        elif sum_model_ratio != 1 or sum_clip_ratio != 1:
+            print(f"[Warning] Apply Model Merge: Sum of model ratios != 1. Ratios will be normalised")
+
+        ckpt_paths = []
+        model_weights = []
+        clip_weights = []
+
+        for model_name, model_ratio, clip_ratio in model_stack:
+            if sum_model_ratio != 0:
+                model_ratio = model_ratio / sum_model_ratio
+            if sum_clip_ratio != 0:
+                clip_ratio = clip_ratio / sum_clip_ratio
+
+            print(f"Apply Model Merge: Model Name {model_name}, Model Ratio {model_ratio}, CLIP Ratio {clip_ratio}")
+            ckpt_paths.append(folder_paths.get_full_path("checkpoints", model_name))
+            model_weights.append(model_ratio)
+            clip_weights.append(clip_ratio)
+
+            model_mix_info = model_mix_info + "Model Name: " + model_name + "\nModel Ratio: " + str(round(model_ratio, 4)) + "\nCLIP Ratio: " + str(round(clip_ratio, 4)) + "\n"
+
+        model, clip = stream_merge_checkpoints(ckpt_paths, model_weights, clip_weights)
+
+        show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Model-Merge-Nodes#cr-apply-model-merge"
+
+        return (model, clip, model_mix_info, show_help, )
+
 #---------------------------------------------------------------------------------------------------------------------#
 # MAPPINGS
 #---------------------------------------------------------------------------------------------------------------------#
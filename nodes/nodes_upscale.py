@@ -36,8 +36,8 @@ class CR_UpscaleImage:
                      }
                 }
 
-    RETURN_TYPES = ("IMAGE", "STRING", )
-    RETURN_NAMES = ("IMAGE", "show_help", )
+    RETURN_TYPES = ("IMAGE", "STRING", "STRING", )
+    RETURN_NAMES = ("IMAGE", "show_help", "show_text", )
     FUNCTION = "upscale"
     CATEGORY = icons.get("Comfyroll/Upscale")
     
@@ -47,31 +47,24 @@ class CR_UpscaleImage:
         up_model = load_model(upscale_model)
 
         # Upscale with model
-        up_image = upscale_with_model(up_model, image)  
+        up_image, plan = upscale_with_model(up_model, image)
+        show_text = f"{upscale_model}: {describe_plan(plan)}"
 
-        for img in image:
-            pil_img = tensor2pil(img)
-            original_width, original_height = pil_img.size
-
-        for img in up_image:
-            # Get new size
-            pil_img = tensor2pil(img)
-            upscaled_width, upscaled_height = pil_img.size
+        # Get the original and new sizes from the [B,H,W,C] shapes
+        original_width, original_height = image.shape[2], image.shape[1]
+        upscaled_width, upscaled_height = up_image.shape[2], up_image.shape[1]
 
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Upscale-Nodes#cr-upscale-image"
 
         # Return if no rescale needed
         if upscaled_width == original_width and rescale_factor == 1:
-            return (up_image, show_help)
+            return (up_image, show_help, show_text, )
               
-        # Image resize
-        scaled_images = []
-        
-        for img in up_image:
-            scaled_images.append(pil2tensor(apply_resize_image(tensor2pil(img), original_width, original_height, rounding_modulus, mode, supersample, rescale_factor, resize_width, resampling_method)))
-        images_out = torch.cat(scaled_images, dim=0)
+        # Image resize, the whole batch at once
+        new_width, new_height = get_resize_size(original_width, original_height, rounding_modulus, mode, rescale_factor, resize_width)
+        images_out = resize_image_batch(up_image, new_width, new_height, supersample, resampling_method)
  
-        return (images_out, show_help, )        
+        return (images_out, show_help, show_text, )
  
 #---------------------------------------------------------------------------------------------------------------------
 class CR_MultiUpscaleStack:
@@ -139,20 +132,20 @@ class CR_ApplyMultiUpscale:
                             }
         }
     
-    RETURN_TYPES = ("IMAGE", "STRING", )
-    RETURN_NAMES = ("IMAGE", "show_help", )
+    RETURN_TYPES = ("IMAGE", "STRING", "STRING", )
+    RETURN_NAMES = ("IMAGE", "show_help", "show_text", )
     FUNCTION = "apply"
     CATEGORY = icons.get("Comfyroll/Upscale")
 
     def apply(self, image, resampling_method, supersample, rounding_modulus, upscale_stack):
 
         # Get original size
-        pil_img = tensor2pil(image)
-        original_width, original_height = pil_img.size
+        original_width, original_height = image.shape[2], image.shape[1]
     
         # Extend params with upscale-stack items 
         params = list()
         params.extend(upscale_stack)
+        plans = []
 
         # Loop through the list
         for tup in params:
@@ -162,28 +155,23 @@ class CR_ApplyMultiUpscale:
             up_model = load_model(upscale_model)
 
             # Upscale with model
-            up_image = upscale_with_model(up_model, image)
+            up_image, plan = upscale_with_model(up_model, image)
+            plans.append(f"{upscale_model}: {describe_plan(plan)}")
 
             # Get new size
-            pil_img = tensor2pil(up_image)
-            upscaled_width, upscaled_height = pil_img.size
+            upscaled_width, upscaled_height = up_image.shape[2], up_image.shape[1]
 
             # Return if no rescale needed
             if upscaled_width == original_width and rescale_factor == 1:
                 image = up_image           
             else:      
-                # Image resize
-                scaled_images = []
-                mode = "rescale"
-                resize_width = 1024 
-                
-                for img in up_image:
-                    scaled_images.append(pil2tensor(apply_resize_image(tensor2pil(img), original_width, original_height, rounding_modulus, mode, supersample, rescale_factor, resize_width, resampling_method)))
-                image = torch.cat(scaled_images, dim=0)
+                # Image resize, the whole batch at once
+                new_width, new_height = get_resize_size(original_width, original_height, rounding_modulus, "rescale", rescale_factor)
+                image = resize_image_batch(up_image, new_width, new_height, supersample, resampling_method)
             
         show_help = "https://github.com/Suzie1/ComfyUI_Comfyroll_CustomNodes/wiki/Upscale-Nodes#cr-apply-multi-upscale"
 
-        return (image, show_help, )
+        return (image, show_help, "\n".join(plans), )
 
 #---------------------------------------------------------------------------------------------------------------------
 # MAPPINGS
@@ -14,33 +14,11 @@ from pathlib import Path
 import typing as t
 from dataclasses import dataclass
 from .functions_xygrid import create_images_grid_by_columns, Annotation
+from .functions_fonts import get_font
+from .functions_io import list_subfolders
+from .functions_save import reserve_filenames, numbered_counter, write_image
 from ..categories import icons
-    
-def tensor_to_pillow(image: t.Any) -> Image.Image:
-    return Image.fromarray(np.clip(255. * image.cpu().numpy().squeeze(), 0, 255).astype(np.uint8))
-
-def pillow_to_tensor(image: Image.Image) -> t.Any:
-    return torch.from_numpy(np.array(image).astype(np.float32) / 255.0).unsqueeze(0)
-
-def find_highest_numeric_value(directory, filename_prefix):
-    highest_value = -1  # Initialize with a value lower than possible numeric values
-    
-    # Iterate through all files in the directory
-    for filename in os.listdir(directory):
-        if filename.startswith(filename_prefix):
-            try:
-                # Extract numeric part of the filename
-                numeric_part = filename[len(filename_prefix):]
-                numeric_str = re.search(r'\d+', numeric_part).group()
-                numeric_value = int(numeric_str)
-                # Check if the current numeric value is higher than the highest found so far
-                if numeric_value > highest_value:
-                    highest_value = int(numeric_value)
-            except ValueError:
-                # If the numeric part is not a valid integer, ignore the file
-                continue
-    
-    return highest_value
+from .functions_conversion import pil2tensor
     
 #---------------------------------------------------------------------------------------------------------------------#
 class CR_XYList:
@@ -207,10 +185,10 @@ class CR_XYFromFolder:
     def INPUT_TYPES(cls) -> dict[str, t.Any]:
     
         input_dir = folder_paths.output_directory
-        image_folder = [name for name in os.listdir(input_dir) if os.path.isdir(os.path.join(input_dir,name))] 
+        image_folder = list_subfolders(input_dir)
         
         return {"required":
-                    {"image_folder": (sorted(image_folder), ),
+                    {"image_folder": (image_folder, ),
                      "start_index": ("INT", {"default": 1, "min": 0, "max": 10000}),
                      "end_index": ("INT", {"default": 1, "min": 1, "max": 10000}),
                      "max_columns": ("INT", {"default": 1, "min": 1, "max": 10000}),
@@ -239,22 +217,18 @@ class CR_XYFromFolder:
         image_path = os.path.join(input_dir, image_folder)
         file_list = sorted(os.listdir(image_path), key=lambda s: sum(((s, int(n)) for s, n in re.findall(r'(\D+)(\d+)', 'a%s0' % s)), ()))
         
-        sample_frames = []
         pillow_images = []
         
         if len(file_list) < end_index:
             end_index = len(file_list)
 
+        # The grid is assembled in PIL, so keep the decoded frames as PIL images
         for num in range(start_index, end_index + 1):
             i = Image.open(os.path.join(image_path, file_list[num - 1]))
-            image = i.convert("RGB")
-            image = np.array(image).astype(np.float32) / 255.0
-            image = torch.from_numpy(image)[None,]
-            image = image.squeeze()
-            sample_frames.append(image)
+            pillow_images.append(i.convert("RGB"))
         
         resolved_font_path = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "fonts\Roboto-Regular.ttf")
-        font = ImageFont.truetype(str(resolved_font_path), size=font_size)
+        font = get_font(resolved_font_path, font_size)
         
         start_x_ann = (start_index % max_columns) - 1
         start_y_ann = int(start_index / max_columns) 
@@ -266,16 +240,13 @@ class CR_XYFromFolder:
         row_list = [item.strip() for item in row_list]
          
         annotation = Annotation(column_texts=column_list, row_texts=row_list, font=font)              
-        images = torch.stack(sample_frames)
-        
-        pillow_images = [tensor_to_pillow(i) for i in images]
         pillow_grid = create_images_grid_by_columns(
             images=pillow_images,
             gap=gap,
             annotation=annotation,
             max_columns=max_columns,
         )
-        tensor_grid = pillow_to_tensor(pillow_grid)
+        tensor_grid = pil2tensor(pillow_grid)
 
         return (tensor_grid, trigger, show_help, )
 
@@ -290,11 +261,11 @@ class CR_XYSaveGridImage:
     def INPUT_TYPES(cls):
     
         output_dir = folder_paths.output_directory
-        output_folders = [name for name in os.listdir(output_dir) if os.path.isdir(os.path.join(output_dir,name))]
+        output_folders = list_subfolders(output_dir)
     
         return {
             "required": {"mode": (["Save", "Preview"],),
-                         "output_folder": (sorted(output_folders), ),
+                         "output_folder": (output_folders, ),
                          "image": ("IMAGE", ),
                          "filename_prefix": ("STRING", {"default": "CR"}),
                          "file_format": (["webp", "jpg", "png", "tif"],),
@@ -331,26 +302,20 @@ class CR_XYSaveGridImage:
 
         print(f"[Info] CR Save XY Grid Image: Output path is `{out_path}`")
         
-        # Set the counter
-        counter = find_highest_numeric_value(out_path, filename_prefix) + 1
-        #print(f"[Debug] counter {counter}")
+        # Reserve the next file name, the folder is only scanned on the first save
+        out_filename = reserve_filenames(out_path, filename_prefix, 1, lambda counter: f"{filename_prefix}_{counter:05}.{file_format}", numbered_counter)[0]
+        output_filename = os.path.splitext(out_filename)[0]
         
         # Output image
         output_image = image[0].cpu().numpy()
-        img = Image.fromarray(np.clip(output_image * 255.0, 0, 255).astype(np.uint8))
+        img = np.clip(output_image * 255.0, 0, 255).astype(np.uint8)
         
-        output_filename = f"{filename_prefix}_{counter:05}"
-        img_params = {'png': {'compress_level': 4}, 
-                      'webp': {'method': 6, 'lossless': False, 'quality': 80},
-                      'jpg': {'format': 'JPEG'},
-                      'tif': {'format': 'TIFF'}
-                     } 
         self.type = "output" if mode == "Save" else 'temp'
 
-        resolved_image_path = os.path.join(out_path, f"{output_filename}.{file_format}")
-        img.save(resolved_image_path, **img_params[file_format])
-        print(f"[Info] CR Save XY Grid Image: Saved to {output_filename}.{file_format}")
-        out_filename = f"{output_filename}.{file_format}"
+        # Written into the placeholder reserved above, then renamed into place
+        resolved_image_path = os.path.join(out_path, out_filename)
+        out_filename = os.path.basename(write_image(img, resolved_image_path, file_format))
+        print(f"[Info] CR Save XY Grid Image: Saved to {out_filename}")
         preview = {"ui": {"images": [{"filename": out_filename,"subfolder": out_path,"type": self.type,}]}}
        
         return preview